@@ -0,0 +1,204 @@
+# benchmark.py
+#
+# Banco de pruebas de rendimiento de MathBackend: mide por separado el cálculo
+# y el gráfico de cada problema del corpus, con mediana, p95 y memoria pico. El
+# gráfico se mide como en la interfaz, con MathBackend.renderizar (construir la
+# figura y rasterizarla a PNG con Agg), que es donde está el coste en 3D.
+#
+#   python benchmark.py -o resultados.json                 # medir y guardar
+#   python benchmark.py --comparar base.json               # marcar regresiones (código de salida 1)
+#   python benchmark.py --filtro esfericas -r 3            # solo algunos casos
+#
+# Los problemas usan el mismo formato que lote.py; los de tipo "muchos" resuelven
+# su lista de integrales triples con MathBackend.solve_many.
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import sympy as sp
+
+from calculo import MathBackend
+from lote import resolver_problema
+
+RECT = {"x": ["0", "1"], "y": ["0", "2"], "z": ["0", "3"]}
+RECT_VARIABLE = {"x": ["0", "2"], "y": ["0", "2-x"], "z": ["0", "4-x**2-y**2"]}
+CIL = {"z": ["0", "2"], "r": ["0", "1"], "theta": ["0", "2*pi"]}
+CIL_VARIABLE = {"z": ["r**2", "9-r**2"], "r": ["0", "2"], "theta": ["0", "2*pi"]}
+ESF = {"rho": ["0", "1"], "phi": ["0", "pi"], "theta": ["0", "2*pi"]}
+ESF_VARIABLE = {"rho": ["0", "2*cos(phi)"], "phi": ["0", "pi/2"], "theta": ["0", "2*pi"]}
+ESF_OCTANTE = {"rho": ["0", "1"], "phi": ["0", "pi/2"], "theta": ["0", "pi/2"]}
+
+CORPUS = {
+    "rectangulares/polinomico": {"func": "x**2*y + z**3*x", "mode": "Rectangulares", "limits": RECT},
+    "rectangulares/trigonometrico": {"func": "sin(x)*cos(y)*z", "mode": "Rectangulares", "limits": RECT},
+    "rectangulares/exponencial": {"func": "exp(x+y)*z", "mode": "Rectangulares", "limits": RECT},
+    "rectangulares/limites_variables": {"func": "x*y*z", "mode": "Rectangulares", "limits": RECT_VARIABLE},
+    "cilindricas/polinomico": {"func": "x**2 + y**2 + z", "mode": "Cilíndricas", "limits": CIL},
+    "cilindricas/trigonometrico": {"func": "sin(x)**2*z", "mode": "Cilíndricas", "limits": CIL},
+    "cilindricas/exponencial": {"func": "exp(-(x**2+y**2))", "mode": "Cilíndricas", "limits": CIL},
+    "cilindricas/limites_variables": {"func": "r", "mode": "Cilíndricas", "limits": CIL_VARIABLE},
+    "esfericas/polinomico": {"func": "x**2 + y**2 + z**2", "mode": "Esféricas", "limits": ESF},
+    "esfericas/trigonometrico": {"func": "cos(phi)**2", "mode": "Esféricas", "limits": ESF},
+    "esfericas/exponencial": {"func": "exp(-rho)", "mode": "Esféricas", "limits": ESF},
+    "esfericas/limites_variables": {"func": "1", "mode": "Esféricas", "limits": ESF_VARIABLE},
+    "esfericas/polinomio_grado4": {"func": "(x+y+z)**4", "mode": "Esféricas", "limits": ESF},
+    "esfericas/polinomio_grado6": {"func": "(x+y+z)**6", "mode": "Esféricas", "limits": ESF},
+    "esfericas/octante": {"func": "x**2*y + z", "mode": "Esféricas", "limits": ESF_OCTANTE},
+    "green/polinomico": {"tipo": "green", "P": "-y**3", "Q": "x**3", "limits": {"x": ["0", "1"], "y": ["0", "1"]}},
+    "green/trigonometrico": {"tipo": "green", "P": "sin(y)", "Q": "x*cos(y)", "limits": {"x": ["0", "pi"], "y": ["0", "pi"]}},
+    "stokes/paraboloide": {"tipo": "stokes", "P": "z", "Q": "x", "R": "y",
+                           "limits": {"z": "x**2+y**2", "x": ["0", "1"], "y": ["0", "1"]}},
+    "stokes/exponencial": {"tipo": "stokes", "P": "y*z", "Q": "x*z", "R": "exp(x*y)",
+                           "limits": {"z": "1-x-y", "x": ["0", "1"], "y": ["0", "1"]}},
+    "divergencia/polinomico": {"tipo": "divergencia", "P": "x**3", "Q": "y**3", "R": "z**3",
+                               "limits": {"x": ["0", "1"], "y": ["0", "1"], "z": ["0", "1"]}},
+    "divergencia/trigonometrico": {"tipo": "divergencia", "P": "sin(x)", "Q": "cos(y)", "R": "x*y*z",
+                                   "limits": {"x": ["0", "pi"], "y": ["0", "pi"], "z": ["0", "1"]}},
+    "densidad/rectangulares": {"func": "x*y*z", "mode": "Rectangulares", "limits": RECT_VARIABLE,
+                               "grafico": "densidad"},
+    "densidad/esfericas": {"func": "exp(-rho)", "mode": "Esféricas", "limits": ESF, "grafico": "densidad"}
+}
+CORPUS["solve_many/triples"] = {
+    "tipo": "muchos", "workers": 2,
+    "problemas": [(p["func"], p["limits"], p["mode"]) for p in CORPUS.values() if "func" in p]
+}
+
+
+def _estadisticas(muestras):
+    return {
+        "mediana_ms": round(float(np.median(muestras)), 3),
+        "p95_ms": round(float(np.percentile(muestras, 95)), 3),
+        "min_ms": round(float(np.min(muestras)), 3)
+    }
+
+
+def _resolver_muchos(backend, problema):
+    """Resuelve la lista de un problema de tipo "muchos" con solve_many (sin gráfico)."""
+    resultados = dict(backend.solve_many(problema["problemas"], workers=problema.get("workers")))
+    errores = [r["error"] for r in resultados.values() if "error" in r]
+    return {
+        "resultado_numerico": [resultados[i].get("resultado_numerico") for i in sorted(resultados)],
+        **({"error": errores[0]} if errores else {})
+    }, None
+
+
+def _ejecutar_una_vez(problema):
+    """Resuelve y grafica el problema en frío (backend nuevo y caché de SymPy vacía)."""
+    sp.core.cache.clear_cache()
+    backend = MathBackend()
+    resolver = _resolver_muchos if problema.get("tipo") == "muchos" else resolver_problema
+    inicio = time.perf_counter()
+    resultado, grafico = resolver(backend, problema)
+    t_calculo = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    png = backend.renderizar(grafico[0], *grafico[1]) if grafico is not None else None
+    t_grafico = (time.perf_counter() - inicio) * 1000
+    return resultado, t_calculo, t_grafico, png is not None
+
+
+def medir_caso(problema, repeticiones):
+    """Mediana/p95 del cálculo y del gráfico y memoria pico (en una pasada aparte con tracemalloc)."""
+    _ejecutar_una_vez(problema)  # calentamiento: importaciones perezosas de SymPy y matplotlib
+    tiempos_calculo, tiempos_grafico = [], []
+    for _ in range(repeticiones):
+        resultado, t_calculo, t_grafico, hay_grafico = _ejecutar_una_vez(problema)
+        tiempos_calculo.append(t_calculo)
+        tiempos_grafico.append(t_grafico)
+
+    tracemalloc.start()
+    _ejecutar_una_vez(problema)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "calculo": _estadisticas(tiempos_calculo),
+        "grafico": _estadisticas(tiempos_grafico),
+        "memoria_pico_kb": round(pico / 1024, 1),
+        "resultado_numerico": resultado.get("resultado_numerico"),
+        "error": resultado.get("error"),
+        "grafico_generado": hay_grafico
+    }
+
+
+def comparar(actual, base, tolerancia, minimo_ms):
+    """
+    Lista de regresiones: casos cuya mediana (de cálculo o de gráfico) empeora
+    más de `tolerancia` (fracción) y más de `minimo_ms` respecto a la base.
+    """
+    regresiones = []
+    for nombre, caso in actual["casos"].items():
+        caso_base = base["casos"].get(nombre)
+        if caso_base is None:
+            continue
+        for parte in ("calculo", "grafico"):
+            antes = caso_base[parte]["mediana_ms"]
+            ahora = caso[parte]["mediana_ms"]
+            if ahora - antes > minimo_ms and ahora > antes * (1 + tolerancia):
+                regresiones.append(f"{nombre} [{parte}]: {antes:.1f} ms -> {ahora:.1f} ms (+{(ahora / antes - 1) * 100:.0f}%)")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento de MathBackend.")
+    parser.add_argument("-r", "--repeticiones", type=int, default=5,
+                        help="mediciones por caso (además de una de calentamiento)")
+    parser.add_argument("-o", "--salida", default=None,
+                        help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--filtro", default=None,
+                        help="solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--comparar", metavar="BASE", default=None,
+                        help="JSON de una ejecución anterior contra el que buscar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.25,
+                        help="empeoramiento relativo permitido antes de marcar regresión (0.25 = 25%%)")
+    parser.add_argument("--minimo-ms", type=float, default=5.0,
+                        help="empeoramiento absoluto mínimo para marcar regresión")
+    args = parser.parse_args(argv)
+
+    informe = {
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sympy": sp.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+            "repeticiones": args.repeticiones
+        },
+        "casos": {}
+    }
+    for nombre, problema in CORPUS.items():
+        if args.filtro and args.filtro not in nombre:
+            continue
+        caso = medir_caso(problema, args.repeticiones)
+        informe["casos"][nombre] = caso
+        print(f"{nombre:34s} cálculo {caso['calculo']['mediana_ms']:9.1f} ms (p95 {caso['calculo']['p95_ms']:9.1f})"
+              f"  gráfico {caso['grafico']['mediana_ms']:7.1f} ms  memoria {caso['memoria_pico_kb']:9.1f} KiB",
+              file=sys.stderr)
+
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    else:
+        print(texto)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as archivo:
+            base = json.load(archivo)
+        regresiones = comparar(informe, base, args.tolerancia, args.minimo_ms)
+        for linea in regresiones:
+            print(f"REGRESIÓN {linea}", file=sys.stderr)
+        if regresiones:
+            return 1
+        print("Sin regresiones respecto a la base.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Carpeta por defecto de la caché persistente (se puede cambiar con CALCULO_CACHE_DIR)
+DIRECTORIO_CACHE = os.environ.get(
+    "CALCULO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "calculo_multivariado")
+)
+
+
+class CacheLRU:
+    """
+    Caché acotada con política LRU (se descarta el elemento usado hace más tiempo).
+    Es segura entre hilos y lleva la cuenta de aciertos y fallos.
+    """
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, por_defecto=None):
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return por_defecto
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def obtener_o_calcular(self, clave, calcular):
+        """
+        Devuelve el valor guardado para `clave` o lo calcula con `calcular()`.
+        El cálculo se hace fuera del candado; si lanza una excepción no se guarda nada.
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+        valor = calcular()
+        self.guardar(clave, valor)
+        return valor
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "tamano": len(self._datos),
+                "capacidad": self.capacidad,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0
+            }
+
+
+class CacheResultados:
+    """
+    Caché persistente de resultados en un archivo SQLite, de modo que sobreviva
+    entre ejecuciones de la aplicación. Cada entrada guarda el diccionario de
+    resultado en JSON; cuando el tamaño total supera `max_bytes` se eliminan las
+    entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, ruta=None, max_bytes=16 * 1024 * 1024):
+        if ruta is None:
+            os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+            ruta = os.path.join(DIRECTORIO_CACHE, "resultados.sqlite3")
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, timeout=5, check_same_thread=False)
+        with self._lock, self._conexion:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute("PRAGMA synchronous=NORMAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                "clave TEXT PRIMARY KEY, valor TEXT NOT NULL, "
+                "tamano INTEGER NOT NULL, ultimo_uso REAL NOT NULL)"
+            )
+
+    def obtener(self, clave):
+        """Devuelve el diccionario guardado para `clave` o None."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT valor FROM resultados WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            with self._conexion:
+                self._conexion.execute(
+                    "UPDATE resultados SET ultimo_uso = ? WHERE clave = ?", (time.time(), clave)
+                )
+        # JSON no distingue tuplas: los resultados solo usan tuplas (p. ej. "curl")
+        return {k: tuple(v) if isinstance(v, list) else v for k, v in json.loads(fila[0]).items()}
+
+    def guardar(self, clave, resultado):
+        valor = json.dumps(resultado, ensure_ascii=False)
+        tamano = len(valor.encode("utf-8"))
+        if tamano > self.max_bytes:
+            return
+        with self._lock, self._conexion:
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO resultados (clave, valor, tamano, ultimo_uso) VALUES (?, ?, ?, ?)",
+                (clave, valor, tamano, time.time())
+            )
+            self._desalojar()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta que el total quepa en `max_bytes`."""
+        total = self._conexion.execute("SELECT COALESCE(SUM(tamano), 0) FROM resultados").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        a_borrar = []
+        for clave, tamano in self._conexion.execute(
+            "SELECT clave, tamano FROM resultados ORDER BY ultimo_uso"
+        ):
+            if total <= self.max_bytes:
+                break
+            a_borrar.append((clave,))
+            total -= tamano
+        self._conexion.executemany("DELETE FROM resultados WHERE clave = ?", a_borrar)
+
+    def limpiar(self):
+        with self._lock, self._conexion:
+            self._conexion.execute("DELETE FROM resultados")
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            entradas, total = self._conexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM resultados"
+            ).fetchone()
+            return {
+                "ruta": self.ruta,
+                "entradas": entradas,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos
+            }
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
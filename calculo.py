@@ -1,102 +1,838 @@
+import contextlib
+import functools
+import hashlib
+import inspect
+import io
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 import sympy as sp
 import numpy as np
-import matplotlib.pyplot as plt
+
+from cache import CacheLRU, CacheResultados
+from cubatura import NODOS_POR_DEFECTO, cuadratura_iterada
+from figuras import RegistroFiguras
+from mallas import caras_de_region, centros_de_celdas, malla_adaptativa, muestrear_densidad
+from nucleos import compilar, compilar_c
+from perfilado import PERFILADOR
+from polinomios import integrar_polinomio
+from separables import integrar_separable
+from simetrias import simplificar_por_simetria
+
+
+def _ejecutar_en_proceso(nombre, args, kwargs, cola, opciones):
+    """
+    Punto de entrada del proceso de trabajo: crea un backend propio (sin límite
+    de tiempo ni caché) y devuelve por la cola el diccionario de resultado.
+    """
+    try:
+        resultado = getattr(MathBackend(**opciones), nombre)(*args, **kwargs)
+    except Exception as e:
+        resultado = {"error": f"Error en el cálculo: {e}"}
+    cola.put(resultado)
+
+
+def _contexto_tareas():
+    """
+    Contexto de multiprocessing para TareaCalculo. Con fork, el hijo hereda los
+    candados que tuviera tomados otro hilo del proceso (el de carga del backend,
+    los de renderizado de la interfaz: CacheLRU, PERFILADOR, la caché de fuentes
+    de matplotlib) y puede bloquearse para siempre. Se usa forkserver, cuyo
+    servidor es un proceso nuevo de un solo hilo que ya tiene importado este
+    módulo (y SymPy), o spawn donde no existe.
+    """
+    if "forkserver" in mp.get_all_start_methods():
+        contexto = mp.get_context("forkserver")
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return mp.get_context("spawn")
+
+
+class TareaCalculo:
+    """
+    Cálculo del backend ejecutado en un proceso aparte, de modo que se pueda
+    terminar aunque sp.integrate no devuelva el control.
+
+    - limite: segundos tras los cuales listo() cancela la tarea (None = sin límite)
+    - opciones: argumentos para el MathBackend del proceso de trabajo
+    - al_terminar: función opcional que recibe el resultado cuando llega
+    - kwargs: argumentos por nombre del método (p. ej. metodo="numerico")
+    """
+
+    def __init__(self, nombre, args, limite=None, opciones=None, kwargs=None):
+        contexto = _contexto_tareas()
+        self._cola = contexto.Queue(maxsize=1)
+        self._proceso = contexto.Process(
+            target=_ejecutar_en_proceso, args=(nombre, args, kwargs or {}, self._cola, opciones or {}), daemon=True
+        )
+        self._proceso.start()
+        self._inicio = time.monotonic()
+        self.limite = limite
+        self.al_terminar = None
+        self.resultado = None
+
+    def esperar(self, timeout=None):
+        """Espera el resultado hasta `timeout` segundos. Devuelve True si llegó."""
+        if self.resultado is not None:
+            return True
+        try:
+            self.resultado = self._cola.get(timeout=timeout)
+        except queue.Empty:
+            if not self._proceso.is_alive() and self._proceso.exitcode not in (0, None):
+                self.resultado = {"error": f"El proceso de cálculo terminó inesperadamente (código {self._proceso.exitcode})"}
+                return True
+            return False
+        self._proceso.join()
+        if self.al_terminar is not None:
+            self.al_terminar(self.resultado)
+        return True
+
+    def listo(self):
+        """
+        Comprueba sin bloquear si la tarea terminó. Si se agotó el límite de
+        tiempo, la cancela y deja como resultado el diccionario de tiempo agotado.
+        """
+        if self.esperar(0):
+            return True
+        if self.limite and time.monotonic() - self._inicio > self.limite:
+            self.cancelar()
+            self.resultado = _resultado_tiempo_agotado(self.limite)
+            return True
+        return False
+
+    def cancelar(self):
+        """Termina el proceso de trabajo si sigue en ejecución."""
+        if self._proceso.is_alive():
+            self._proceso.terminate()
+        self._proceso.join()
+        self._cola.close()
+        if self.resultado is None:
+            self.resultado = {"error": "Cálculo cancelado.", "cancelado": True}
+
+
+class TareaTerminada:
+    """Tarea con la misma interfaz que TareaCalculo cuyo resultado ya se conoce (p. ej. de la caché)."""
+
+    def __init__(self, resultado):
+        self.resultado = resultado
+
+    def esperar(self, timeout=None):
+        return True
+
+    def listo(self):
+        return True
+
+    def cancelar(self):
+        pass
+
+
+# Backend precargado en cada proceso del pool de MathBackend.solve_many
+_backend_del_trabajador = None
+
+
+def _inicializar_trabajador(timeout, ruta_cache, perfilar, nativo, pids):
+    global _backend_del_trabajador
+    # El proceso principal usa los pids para terminar el pool sin esperar (ver resolver_en_pool)
+    pids.put(os.getpid())
+    cache = CacheResultados(ruta_cache) if ruta_cache else None
+    _backend_del_trabajador = MathBackend(timeout=timeout, cache_resultados=cache, perfilar=perfilar, nativo=nativo)
+    # El proceso del pool solo calcula: el límite de tiempo puede ir por señal
+    _backend_del_trabajador._limite_por_senal = hasattr(signal, "setitimer")
+
+
+def _resolver_en_trabajador(funcion, trabajo):
+    return funcion(_backend_del_trabajador, trabajo)
+
+
+def _resolver_integral_triple(backend, trabajo):
+    """Trabajo de solve_many: (func_str, limits, mode[, metodo])."""
+    return backend.solve_triple_integral(*trabajo)
+
+
+class _TiempoAgotado(BaseException):
+    """Interrumpe un cálculo al vencer el temporizador (hereda de BaseException
+    para que ningún `except Exception` de SymPy o del backend la absorba)."""
+
+
+def _interrumpir_por_tiempo(signum, frame):
+    raise _TiempoAgotado()
+
+
+def _resultado_tiempo_agotado(limite):
+    return {
+        "error": f"Tiempo límite excedido: el cálculo superó {limite:g} s y fue cancelado.",
+        "timeout": True,
+        "tiempo_limite": limite
+    }
+
+
+def _con_limite_de_tiempo(metodo):
+    """
+    Decorador para los métodos de resolución: si hay un límite de tiempo
+    (argumento `timeout` o el del backend) el cálculo se ejecuta en un proceso
+    aparte que se termina al agotarse el presupuesto.
+
+    Dentro de los procesos del pool de solve_many, que ya están dedicados al
+    cálculo, se usa un temporizador SIGALRM en lugar de un proceso por problema.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, timeout=None, **kwargs):
+        limite = self.timeout if timeout is None else timeout
+        if not limite:
+            return metodo(self, *args, **kwargs)
+
+        if self._limite_por_senal:
+            anterior = signal.signal(signal.SIGALRM, _interrumpir_por_tiempo)
+            signal.setitimer(signal.ITIMER_REAL, limite)
+            try:
+                return metodo(self, *args, **kwargs)
+            except _TiempoAgotado:
+                return _resultado_tiempo_agotado(limite)
+            finally:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, anterior)
+
+        tarea = TareaCalculo(metodo.__name__, args, opciones={"perfilar": self.perfilar, "nativo": self.nativo},
+                             kwargs=kwargs)
+        try:
+            if tarea.esperar(limite):
+                return tarea.resultado
+        finally:
+            tarea.cancelar()
+        return _resultado_tiempo_agotado(limite)
+    return envoltura
+
+
+def _con_medicion_de_tiempos(metodo):
+    """
+    Decorador que, con el perfilado activado, mide la llamada completa y sus
+    etapas (ver MathBackend._etapa). Los tiempos en ms se adjuntan al resultado
+    bajo la clave "timings" (si es un diccionario) y se suman a los contadores
+    del proceso. Si el cálculo corrió en un proceso aparte, sus etapas vienen en
+    el propio resultado y se incorporan aquí.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        if not self.perfilar or getattr(self._medicion, "tiempos", None) is not None:
+            return metodo(self, *args, **kwargs)
+
+        tiempos = self._medicion.tiempos = {}
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(self, *args, **kwargs)
+        finally:
+            self._medicion.tiempos = None
+        total = (time.perf_counter() - inicio) * 1000
+
+        if isinstance(resultado, dict):
+            for etapa, ms in resultado.pop("timings", {}).items():
+                if etapa != "total":
+                    tiempos[etapa] = tiempos.get(etapa, 0.0) + ms
+        tiempos["total"] = total
+        tiempos = {etapa: round(ms, 3) for etapa, ms in tiempos.items()}
+        PERFILADOR.registrar(metodo.__name__, tiempos)
+        if isinstance(resultado, dict):
+            resultado["timings"] = tiempos
+        return resultado
+    return envoltura
+
+
+def _argumentos_de_llamada(metodo, args, kwargs):
+    """
+    Argumentos de una llamada a `metodo` (sin self) en el orden de su firma y
+    con los valores por defecto, de modo que f(a, b), f(a, b, "simbolico") y
+    f(a, b, metodo="simbolico") se identifican como el mismo problema.
+    """
+    ligados = inspect.signature(metodo).bind(None, *args, **kwargs)
+    ligados.apply_defaults()
+    return tuple(ligados.arguments.values())[1:]
+
+
+def _con_cache_de_resultados(metodo):
+    """
+    Decorador para los métodos de resolución: busca el resultado en la caché del
+    backend (primero en memoria y luego en disco) antes de calcular, y guarda los
+    resultados sin error.
+    """
+    @functools.wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        if self.cache_resultados is None:
+            return metodo(self, *args, **kwargs)
+
+        # `timeout` es del decorador de límite de tiempo, no del problema
+        argumentos = _argumentos_de_llamada(metodo, args, {k: v for k, v in kwargs.items() if k != "timeout"})
+        claves, resultado = self._buscar_resultado(metodo.__name__, argumentos)
+        if resultado is None:
+            resultado = metodo(self, *args, **kwargs)
+            self._guardar_resultado(claves, resultado)
+        return resultado
+    return envoltura
+
+
+# Estilo de cada superficie de un sólido (ver mallas.caras_de_region): las tapas
+# interna y externa con mapa de colores, las caras de corte grises y translúcidas
+ESTILOS_CARAS = {
+    "c_inf": {"cmap": "winter", "alpha": 0.5},
+    "c_sup": {"cmap": "magma", "alpha": 0.8}
+}
+ESTILO_CARA_CORTE = {"color": "#95A5A6", "alpha": 0.35}
+
+
+def _rectangulares_a_cartesianas(z, y, x):
+    return x, y, z
+
+
+def _cilindricas_a_cartesianas(z, r, theta):
+    return r * np.cos(theta), r * np.sin(theta), z
+
+
+def _esfericas_a_cartesianas(rho, phi, theta):
+    return rho * np.sin(phi) * np.cos(theta), rho * np.sin(phi) * np.sin(theta), rho * np.cos(phi)
+
 
 class MathBackend:
-    def __init__(self):
+    # Cambiar al modificar el formato de los resultados para invalidar la caché en disco
+    VERSION_CACHE = 4
+
+    # Puntos por eje de las mallas de cada tipo de gráfico (nivel de detalle alto).
+    # En Stokes y cilíndricas la malla es adaptativa con n² vértices en total.
+    RESOLUCIONES = {
+        "rectangular": 20,
+        "cilindrico": 40,
+        "esferico": 40,
+        "stokes": 30,
+        "divergencia": 20,
+        "densidad": 64  # rejilla de vóxeles densidad³ del integrando
+    }
+    # Puntos por eje de la malla diezmada que se muestra al rotar o hacer zoom
+    PUNTOS_DETALLE_BAJO = 10
+    # Máximo de flechas del campo vectorial en los gráficos de los teoremas
+    MAX_FLECHAS_2D = 400
+    MAX_FLECHAS_3D = 512
+    # Máximo de puntos de la nube de densidad del integrando
+    PUNTOS_DENSIDAD = 20000
+
+    def __init__(self, timeout=None, cache_resultados=None, perfilar=False, resoluciones=None, max_figuras=8,
+                 nativo=False):
+        """
+        - timeout: límite de tiempo en segundos para cada cálculo (None = sin límite).
+          Cuando se define, cada integral se resuelve en un proceso aparte que se
+          termina si el presupuesto se agota.
+        - cache_resultados: None/False para no usar caché, True para la caché en
+          disco por defecto o una instancia de CacheResultados.
+        - perfilar: si es True, cada resultado incluye los tiempos por etapa en
+          "timings" y estos se acumulan en los contadores del proceso.
+        - resoluciones: puntos por eje de las mallas de los gráficos, por tipo de
+          gráfico (ver RESOLUCIONES); los tipos omitidos usan el valor por defecto.
+        - max_figuras: figuras creadas por los plot_* que pueden seguir vivas a la
+          vez; al superarse se cierran las usadas hace más tiempo (ver figuras.py).
+        - nativo: si es True, el integrando (con el Jacobiano) se compila a C para
+          la cubatura y la densidad del integrando (ver nucleos.compilar_c); sin
+          compilador se usa NumPy.
+        """
+        self.timeout = timeout
+        self.perfilar = perfilar
+        self.nativo = nativo
+        self.resoluciones = {**self.RESOLUCIONES, **(resoluciones or {})}
+        self._medicion = threading.local()
+        self._limite_por_senal = False
+        if cache_resultados is True:
+            cache_resultados = CacheResultados()
+        self.cache_resultados = cache_resultados or None
+        self._cache_resultados_memoria = CacheLRU(capacidad=128)
         self.x, self.y, self.z = sp.symbols('x y z')
         self.r, self.theta = sp.symbols('r theta')
         self.rho, self.phi = sp.symbols('rho phi')
 
+        # Cachés de expresiones ya interpretadas y de núcleos NumPy ya compilados
+        self._cache_expresiones = CacheLRU(capacidad=512)
+        self._cache_funciones = CacheLRU(capacidad=256)
+        # Gráficos ya rasterizados (PNG, ~150 KiB cada uno): dependen solo de los límites
+        self._cache_graficos = CacheLRU(capacidad=32)
+        # Figuras creadas por los plot_* (sin mantenerlas vivas)
+        self.figuras = RegistroFiguras(max_figuras)
+
+    @contextlib.contextmanager
+    def _etapa(self, nombre):
+        """Suma el tiempo del bloque a la etapa `nombre` de la medición en curso, si la hay."""
+        tiempos = getattr(self._medicion, "tiempos", None)
+        if tiempos is None:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            tiempos[nombre] = tiempos.get(nombre, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def estadisticas_tiempos(self):
+        """Resumen de los tiempos por etapa acumulados en el proceso (ver perfilado.PERFILADOR)."""
+        return PERFILADOR.resumen()
+
     def _parse_expression(self, expr_str):
-        return sp.sympify(expr_str)
+        clave = str(expr_str).strip()
+        with self._etapa("sympify"):
+            return self._cache_expresiones.obtener_o_calcular(clave, lambda: sp.sympify(clave))
+
+    def _lambdify(self, variables, expr):
+        """
+        Función NumPy de `expr`, como sp.lambdify(variables, expr, 'numpy') pero
+        con subexpresiones comunes y búfer de salida opcional (ver
+        nucleos.compilar), reutilizando las ya compiladas.
+        """
+        variables = tuple(variables)
+        with self._etapa("lambdify"):
+            return self._cache_funciones.obtener_o_calcular(
+                (variables, expr), lambda: compilar(variables, expr)
+            )
 
-    def solve_triple_integral(self, func_str, limits, mode):
+    def _lambdify_integrando(self, variables, expr):
+        """Como _lambdify, pero con núcleo nativo en C si el backend se creó con nativo=True."""
+        if not self.nativo:
+            return self._lambdify(variables, expr)
+        variables = tuple(variables)
+        with self._etapa("compilacion_c"):
+            return self._cache_funciones.obtener_o_calcular(
+                ("c", variables, expr), lambda: compilar_c(variables, expr)
+            )
+
+    def _buscar_resultado(self, nombre, args):
+        """
+        Busca el resultado de `nombre(*args)` en la caché, primero en memoria y
+        luego en disco. Devuelve (claves, resultado), con resultado None si no está.
+        """
+        with self._etapa("cache"):
+            clave_rapida = (nombre, repr(args))
+            resultado = self._cache_resultados_memoria.obtener(clave_rapida)
+            if resultado is not None:
+                return (clave_rapida, None), dict(resultado)
+
+            clave = self._clave_canonica(nombre, args)
+            resultado = self.cache_resultados.obtener(clave)
+            if resultado is not None:
+                self._cache_resultados_memoria.guardar(clave_rapida, dict(resultado))
+            return (clave_rapida, clave), resultado
+
+    def _guardar_resultado(self, claves, resultado):
+        """Guarda en la caché un resultado sin error bajo las claves de _buscar_resultado."""
+        if "error" in resultado:
+            return
+        clave_rapida, clave = claves
+        resultado = {k: v for k, v in resultado.items() if k != "timings"}
+        self.cache_resultados.guardar(clave, resultado)
+        self._cache_resultados_memoria.guardar(clave_rapida, resultado)
+
+    def _canonizar(self, valor):
+        """Forma canónica de un argumento: las expresiones se comparan por su árbol de SymPy."""
+        if isinstance(valor, str):
+            try:
+                return sp.srepr(self._parse_expression(valor))
+            except Exception:
+                return valor.strip()
+        if isinstance(valor, dict):
+            return {str(k): self._canonizar(v) for k, v in sorted(valor.items())}
+        if isinstance(valor, (list, tuple)):
+            return [self._canonizar(v) for v in valor]
+        return valor
+
+    def _clave_canonica(self, nombre, args):
+        """Clave de la caché de resultados para el problema (método, integrando, límites, modo)."""
+        problema = [self.VERSION_CACHE, nombre, self._canonizar(args)]
+        texto = json.dumps(problema, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def estadisticas_cache(self):
+        """Aciertos, fallos y ocupación de las cachés del backend."""
+        estadisticas = {
+            "expresiones": self._cache_expresiones.estadisticas(),
+            "funciones": self._cache_funciones.estadisticas(),
+            "graficos": self._cache_graficos.estadisticas()
+        }
+        if self.cache_resultados is not None:
+            estadisticas["resultados"] = self.cache_resultados.estadisticas()
+        return estadisticas
+
+    def estadisticas_figuras(self):
+        """Figuras vivas creadas por el backend y memoria estimada de sus gráficos."""
+        return self.figuras.estadisticas()
+
+    def cerrar_figura(self, figura):
+        """Libera una figura devuelta por un plot_* cuando ya no se va a usar."""
+        self.figuras.cerrar(figura)
+
+    @_con_medicion_de_tiempos
+    @_con_cache_de_resultados
+    @_con_limite_de_tiempo
+    def solve_triple_integral(self, func_str, limits, mode, metodo="simbolico"):
+        """
+        - metodo: "simbolico" (por defecto) integra con SymPy y, si no obtiene un
+          número, aproxima por cubatura; "numerico" usa directamente la cubatura.
+        """
         try:
             if mode == "Rectangulares":
-                return self._solve_rectangular(func_str, limits)
+                return self._solve_rectangular(func_str, limits, metodo)
             elif mode == "Cilíndricas":
-                return self._solve_cylindrical(func_str, limits)
+                return self._solve_cylindrical(func_str, limits, metodo)
             elif mode == "Esféricas":
-                return self._solve_spherical(func_str, limits)
+                return self._solve_spherical(func_str, limits, metodo)
             else:
                 return {"error": "Modo no soportado"}
         except Exception as e:
             return {"error": f"Error en el cálculo: {e}"}
 
+    def _integrar(self, integrando, dominios):
+        """
+        Integral exacta de `integrando` sobre `dominios`: primero se quitan los
+        términos que se anulan por paridad, después se prueban los atajos que
+        la resuelven sin la integración anidada de SymPy y, si ninguno aplica,
+        se quitan los armónicos que se anulan por periodicidad (más caro, por
+        eso va después) y se usa sp.integrate. Devuelve (integral, notas para
+        el proceso).
+        """
+        with self._etapa("simetria"):
+            integrando, dominios, notas = simplificar_por_simetria(integrando, dominios, periodicidad=False)
+        if integrando == 0:
+            return sp.Integer(0), notas
+        with self._etapa("polinomios"):
+            atajo = integrar_polinomio(integrando, dominios)
+        if atajo is None:
+            with self._etapa("separacion"):
+                atajo = integrar_separable(integrando, dominios)
+        if atajo is not None:
+            integral, nota = atajo
+            return integral, [*notas, nota]
+        with self._etapa("simetria"):
+            integrando, dominios, periodicas = simplificar_por_simetria(integrando, dominios, paridad=False)
+        notas += periodicas
+        if integrando == 0:
+            return sp.Integer(0), notas
+        return sp.integrate(integrando, *dominios), notas
+
+    def _resolver_integral(self, integrando, dominios, metodo="simbolico", proceso=None):
+        """
+        Integra `integrando` sobre `dominios` (en el orden de sp.integrate) y
+        devuelve las claves de resultado comunes. Si SymPy no llega a un número
+        (o en modo "numerico") el valor se aproxima por cubatura de Gauss-Legendre.
+        Si se da `proceso`, se devuelve también, con las notas de _integrar.
+        """
+        notas = []
+        if metodo == "numerico":
+            integral = None
+            resultado = {"resultado_simbolico": "No calculado (modo numérico)"}
+        else:
+            with self._etapa("integracion"):
+                integral, notas = self._integrar(integrando, dominios)
+            resultado = {"resultado_simbolico": str(integral)}
+        if proceso is not None:
+            resultado = {"proceso": "\n\n".join([proceso, *notas]), **resultado}
+
+        if integral is not None and integral.is_number and not integral.has(sp.Integral):
+            with self._etapa("evalf"):
+                resultado["resultado_numerico"] = f"{integral.evalf():.4f}"
+            return resultado
+
+        try:
+            with self._etapa("cubatura"):
+                valor = cuadratura_iterada(integrando, dominios, lambdificar=self._lambdify,
+                                           lambdificar_integrando=self._lambdify_integrando)
+        except Exception:
+            valor = float("nan")
+        if np.isfinite(valor):
+            resultado["resultado_numerico"] = f"{valor:.4f}"
+            resultado["aproximacion"] = f"Cubatura de Gauss-Legendre ({NODOS_POR_DEFECTO} nodos por eje)"
+        else:
+            resultado["resultado_numerico"] = "N/A"
+        return resultado
+
+    def iniciar_calculo(self, nombre, *args, **kwargs):
+        """
+        Lanza el método de resolución `nombre` (p. ej. "solve_triple_integral") en
+        un proceso aparte sin bloquear y devuelve la tarea, que se sondea con
+        listo() y se puede cancelar. Respeta la caché de resultados y el límite de
+        tiempo del backend.
+        """
+        claves = None
+        if self.cache_resultados is not None:
+            argumentos = _argumentos_de_llamada(getattr(type(self), nombre), args, kwargs)
+            claves, resultado = self._buscar_resultado(nombre, argumentos)
+            if resultado is not None:
+                return TareaTerminada(resultado)
+        tarea = TareaCalculo(nombre, args, limite=self.timeout,
+                             opciones={"perfilar": self.perfilar, "nativo": self.nativo}, kwargs=kwargs)
+
+        def al_terminar(resultado):
+            if claves is not None:
+                self._guardar_resultado(claves, resultado)
+            if "timings" in resultado:
+                PERFILADOR.registrar(nombre, resultado["timings"])
+        tarea.al_terminar = al_terminar
+        return tarea
+
+    def solve_many(self, problems, workers=None, timeout=None):
+        """
+        Resuelve muchas integrales triples en paralelo con un pool de procesos.
+
+        - problems: iterable de tuplas (func_str, limits, mode) o (func_str, limits, mode, metodo)
+        - workers: número de procesos (por defecto, uno por núcleo)
+        - timeout: límite de tiempo por problema (por defecto, el del backend)
+
+        Es un generador: produce (indice, resultado) en el orden en que terminan
+        los problemas, donde `indice` es la posición del problema en `problems`.
+        """
+        yield from self.resolver_en_pool(_resolver_integral_triple, problems, workers, timeout)
+
+    def resolver_en_pool(self, funcion, trabajos, workers=None, timeout=None):
+        """
+        Reparte `trabajos` entre procesos que tienen cada uno un MathBackend
+        precargado; `funcion(backend, trabajo)` debe estar definida a nivel de
+        módulo. Solo se mantienen unos pocos trabajos por proceso en vuelo, de
+        modo que `trabajos` puede ser un flujo largo (p. ej. leído de stdin).
+
+        Como solve_many, es un generador de (indice, resultado) en el orden en
+        que terminan los trabajos; lote.py lo usa con sus propios trabajos.
+        """
+        limite = self.timeout if timeout is None else timeout
+        ruta_cache = self.cache_resultados.ruta if self.cache_resultados is not None else None
+        workers = workers or os.cpu_count() or 1
+        contexto = mp.get_context()
+        pids = contexto.SimpleQueue()
+        pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=contexto, initializer=_inicializar_trabajador,
+            initargs=(limite, ruta_cache, self.perfilar, self.nativo, pids)
+        )
+        pendientes = {}
+        trabajos = enumerate(trabajos)
+        en_vuelo = 2 * workers
+        try:
+            for indice, trabajo in itertools.islice(trabajos, en_vuelo):
+                pendientes[pool.submit(_resolver_en_trabajador, funcion, trabajo)] = indice
+            while pendientes:
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    indice = pendientes.pop(futuro)
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        resultado = {"error": f"Error en el proceso de cálculo: {e}"}
+                    if isinstance(resultado, dict) and "timings" in resultado:
+                        PERFILADOR.registrar(funcion.__name__.lstrip("_"), resultado["timings"])
+                    for siguiente, trabajo in itertools.islice(trabajos, 1):
+                        pendientes[pool.submit(_resolver_en_trabajador, funcion, trabajo)] = siguiente
+                    yield indice, resultado
+        finally:
+            if pendientes:
+                # Quien consume el generador dejó de leer (o hubo un error): sin
+                # límite de tiempo, esperar a los trabajos en curso podría no
+                # acabar nunca, así que se terminan los procesos del pool. Cada
+                # uno comunicó su pid al arrancar; se buscan entre los hijos
+                # vivos, de modo que un pid ya reutilizado nunca se toca
+                trabajadores = set()
+                while not pids.empty():
+                    trabajadores.add(pids.get())
+                for proceso in mp.active_children():
+                    if proceso.pid in trabajadores:
+                        proceso.terminate()
+            pool.shutdown(wait=True, cancel_futures=True)
+            pids.close()
+
     # --- INTEGRALES ---
-    def _solve_rectangular(self, func_str, limits):
+    def _solve_rectangular(self, func_str, limits, metodo="simbolico"):
         f = self._parse_expression(func_str)
         lim_x = [self._parse_expression(l) for l in limits['x']]
         lim_y = [self._parse_expression(l) for l in limits['y']]
         lim_z = [self._parse_expression(l) for l in limits['z']]
-        integral = sp.integrate(f, (self.z, lim_z[0], lim_z[1]), (self.y, lim_y[0], lim_y[1]), (self.x, lim_x[0], lim_x[1]))
+        dominios = [(self.z, lim_z[0], lim_z[1]), (self.y, lim_y[0], lim_y[1]), (self.x, lim_x[0], lim_x[1])]
         proceso = f"∫({lim_x[0]})→({lim_x[1]}) ∫({lim_y[0]})→({lim_y[1]}) ∫({lim_z[0]})→({lim_z[1]}) [{f}] dz dy dx"
-        return {
-            "proceso": proceso,
-            "resultado_simbolico": str(integral),
-            "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A"
-        }
+        return self._resolver_integral(f, dominios, metodo, proceso)
 
-    def _solve_cylindrical(self, func_str, limits):
+    def _solve_cylindrical(self, func_str, limits, metodo="simbolico"):
         f_rect = self._parse_expression(func_str)
         subs = {self.x: self.r * sp.cos(self.theta), self.y: self.r * sp.sin(self.theta)}
-        f_cyl = f_rect.subs(subs)
+        with self._etapa("sustitucion"):
+            f_cyl = f_rect.subs(subs)
         f_integrar = f_cyl * self.r
 
         lim_z = [self._parse_expression(l) for l in limits['z']]
         lim_r = [self._parse_expression(l) for l in limits['r']]
         lim_theta = [self._parse_expression(l) for l in limits['theta']]
 
-        integral = sp.integrate(f_integrar, (self.z, lim_z[0], lim_z[1]), (self.r, lim_r[0], lim_r[1]), (self.theta, lim_theta[0], lim_theta[1]))
+        dominios = [(self.z, lim_z[0], lim_z[1]), (self.r, lim_r[0], lim_r[1]), (self.theta, lim_theta[0], lim_theta[1])]
         proceso = f"∫({lim_theta[0]})→({lim_theta[1]}) ∫({lim_r[0]})→({lim_r[1]}) ∫({lim_z[0]})→({lim_z[1]}) [{f_cyl}] * r dz dr dθ"
-        return {
-            "proceso": proceso,
-            "resultado_simbolico": str(integral),
-            "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A"
-        }
+        return self._resolver_integral(f_integrar, dominios, metodo, proceso)
 
-    def _solve_spherical(self, func_str, limits):
+    def _solve_spherical(self, func_str, limits, metodo="simbolico"):
         f_rect = self._parse_expression(func_str)
         subs = {
             self.x: self.rho * sp.sin(self.phi) * sp.cos(self.theta),
             self.y: self.rho * sp.sin(self.phi) * sp.sin(self.theta),
             self.z: self.rho * sp.cos(self.phi)
         }
-        f_sph = f_rect.subs(subs)
+        with self._etapa("sustitucion"):
+            f_sph = f_rect.subs(subs)
         f_integrar = f_sph * self.rho**2 * sp.sin(self.phi)
 
         lim_rho = [self._parse_expression(l) for l in limits['rho']]
         lim_phi = [self._parse_expression(l) for l in limits['phi']]
         lim_theta = [self._parse_expression(l) for l in limits['theta']]
 
-        integral = sp.integrate(f_integrar, (self.rho, lim_rho[0], lim_rho[1]), (self.phi, lim_phi[0], lim_phi[1]), (self.theta, lim_theta[0], lim_theta[1]))
+        dominios = [(self.rho, lim_rho[0], lim_rho[1]), (self.phi, lim_phi[0], lim_phi[1]), (self.theta, lim_theta[0], lim_theta[1])]
         proceso = f"∫({lim_theta[0]})→({lim_theta[1]}) ∫({lim_phi[0]})→({lim_phi[1]}) ∫({lim_rho[0]})→({lim_rho[1]}) [{f_sph}] * ρ²sin(φ) dρ dφ dθ"
-        return {
-            "proceso": proceso,
-            "resultado_simbolico": str(integral),
-            "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A"
-        }
+        return self._resolver_integral(f_integrar, dominios, metodo, proceso)
 
     # --- GRAFICADOS ---
-    def plot_rectangular_domain(self, limits):
+    def _preparar_figura(self, fig, proyeccion=None, figsize=(12, 9)):
+        """
+        Devuelve (fig, ax) listos para dibujar. Sin `fig` se crea una figura nueva;
+        con `fig` se reutiliza la figura de la interfaz: si ya tiene unos ejes de la
+        misma proyección se vacían y se conservan (con el ángulo de vista en 3D),
+        en otro caso se limpia la figura y se crean unos ejes nuevos.
+        """
+        if fig is None:
+            # Figure sin pyplot: no toca el estado global y se puede construir en
+            # cualquier hilo. Se importa aquí para no retrasar el arranque.
+            from matplotlib.figure import Figure
+            fig = self.figuras.registrar(Figure(figsize=figsize))
+        else:
+            self.figuras.usar(fig)
+
+        ax = fig.axes[0] if fig.axes else None
+        if ax is not None and ax.name == (proyeccion or "rectilinear") and len(fig.axes) == 1:
+            ax.cla()
+            return fig, ax
+
+        # Cambio de proyección o ejes extra (la barra de color de Stokes)
+        vista = (ax.elev, ax.azim) if ax is not None and ax.name == "3d" else None
+        fig.clear()
+        ax = fig.add_subplot(111, projection=proyeccion)
+        if vista is not None and proyeccion == "3d":
+            ax.view_init(*vista)
+        return fig, ax
+
+    def _superficie(self, ax, X, Y, Z, **opciones):
+        """
+        plot_surface con dos niveles de detalle: la malla completa y una copia
+        diezmada, oculta, que la vista interactiva muestra mientras se arrastra o
+        se hace zoom. Se distinguen por su gid ("detalle-alto"/"detalle-bajo").
+        """
+        X, Y, Z = np.broadcast_arrays(X, Y, Z)  # Z puede ser constante
+        filas, columnas = X.shape
+        alta = ax.plot_surface(X, Y, Z, rcount=filas, ccount=columnas, gid="detalle-alto", **opciones)
+
+        # Se conservan siempre la primera y la última fila/columna: el borde del dominio
+        indices_f = np.unique(np.r_[0:filas:max(1, filas // self.PUNTOS_DETALLE_BAJO), filas - 1])
+        indices_c = np.unique(np.r_[0:columnas:max(1, columnas // self.PUNTOS_DETALLE_BAJO), columnas - 1])
+        malla = np.ix_(indices_f, indices_c)
+        opciones.pop("label", None)
+        baja = ax.plot_surface(X[malla], Y[malla], Z[malla], gid="detalle-bajo", **opciones)
+        baja.set_visible(False)
+        return alta
+
+    def _evaluar_campo(self, campo, coordenadas):
+        """Componentes del campo F (cadenas en x, y[, z]) evaluadas en los puntos dados, y |F|."""
+        variables = (self.x, self.y, self.z)[:len(coordenadas)]
+        forma = np.broadcast(*coordenadas).shape
+        componentes = [
+            np.broadcast_to(np.asarray(self._lambdify(variables, self._parse_expression(c))(*coordenadas), dtype=float), forma)
+            for c in campo
+        ]
+        return componentes, np.sqrt(sum(c ** 2 for c in componentes))
+
+    def _dibujar_campo(self, fig, ax, campo, coordenadas, paso):
+        """
+        Superpone las flechas de F en los puntos `coordenadas` (x, y[, z]),
+        coloreadas por |F|, con su barra de color. La flecha más larga mide algo
+        menos que `paso`, la separación entre puntos. Si el campo no se puede
+        evaluar, el gráfico se queda sin flechas.
+        """
+        try:
+            componentes, modulo = self._evaluar_campo(campo, coordenadas)
+            finitos = np.isfinite(modulo)
+            puntos = [np.broadcast_to(c, modulo.shape)[finitos] for c in coordenadas]
+            componentes = [c[finitos] for c in componentes]
+            modulo = modulo[finitos]
+            if modulo.size == 0 or modulo.max() == 0:
+                return None
+
+            if len(coordenadas) == 2:
+                flechas = ax.quiver(*puntos, *componentes, modulo, cmap='plasma', angles='xy',
+                                    scale_units='xy', scale=modulo.max() / (0.9 * paso), width=0.004)
+            else:
+                escala = 0.9 * paso / modulo.max()
+                flechas = ax.quiver(*puntos, *(c * escala for c in componentes),
+                                    arrow_length_ratio=0.3, cmap='plasma', linewidths=1.2)
+                # Cada flecha 3D son tres segmentos: los N astiles y luego las dos mitades de las N puntas
+                flechas.set_array(np.tile(modulo, 3))
+            fig.colorbar(flechas, ax=ax, shrink=0.5, aspect=10, label="|F|")
+            return flechas
+        except Exception as e:
+            print(f"Error al graficar el campo vectorial: {e}")
+            return None
+
+    @_con_medicion_de_tiempos
+    def renderizar(self, nombre, *args, fig=None, tamano=None, dpi=100):
+        """
+        Construye el gráfico `nombre` (uno de los métodos plot_*) y lo rasteriza
+        con Agg. Devuelve los bytes PNG, o None si no se pudo graficar. `tamano`
+        es (ancho, alto) en píxeles. No usa pyplot ni Tk, así que la interfaz lo
+        llama desde un hilo de trabajo y solo recibe la imagen terminada.
+
+        Las imágenes se guardan en una caché acotada por gráfico, límites
+        normalizados y resolución: el integrando no interviene, así que volver a
+        calcular sobre la misma región no vuelve a dibujarla. En un acierto `fig`
+        no se modifica.
+        """
+        with self._etapa("cache"):
+            clave = self._clave_canonica(nombre, [args, tamano, dpi, self.resoluciones])
+            png = self._cache_graficos.obtener(clave)
+        if png is not None:
+            return png
+
+        figura = getattr(self, nombre)(*args, fig=fig)
+        if figura is None:
+            return None
+        if tamano is not None:
+            figura.set_size_inches(tamano[0] / dpi, tamano[1] / dpi)
+        buffer = io.BytesIO()
+        with self._etapa("rasterizado"):
+            figura.savefig(buffer, format="png", dpi=dpi)
+        if fig is None:
+            # La figura se creó solo para la imagen
+            self.cerrar_figura(figura)
+        png = buffer.getvalue()
+        self._cache_graficos.guardar(clave, png)
+        return png
+
+    @_con_medicion_de_tiempos
+    def plot_rectangular_domain(self, limits, fig=None):
+        """
+        Grafica las seis caras del sólido z_inf(x, y) ≤ z ≤ z_sup(x, y),
+        y_inf(x) ≤ y ≤ y_sup(x), x_inf ≤ x ≤ x_sup.
+        """
         try:
             lim_x = [self._parse_expression(l) for l in limits['x']]
             lim_y = [self._parse_expression(l) for l in limits['y']]
             lim_z = [self._parse_expression(l) for l in limits['z']]
 
             x_inf, x_sup = float(lim_x[0].evalf()), float(lim_x[1].evalf())
-            y_inf, y_sup = float(lim_y[0].evalf()), float(lim_y[1].evalf())
-            z_inf, z_sup = float(lim_z[0].evalf()), float(lim_z[1].evalf())
+            y_inf, y_sup = (self._lambdify((self.x,), l) for l in lim_y)
+            z_inf, z_sup = (self._lambdify((self.y, self.x), l) for l in lim_z)
 
-            X, Y = np.meshgrid(np.linspace(x_inf, x_sup, 20), np.linspace(y_inf, y_sup, 20))
-            Z_low = np.full_like(X, z_inf)
-            Z_high = np.full_like(X, z_sup)
+            caras = caras_de_region(
+                [(z_inf, z_sup), (y_inf, y_sup), (x_inf, x_sup)],
+                _rectangulares_a_cartesianas, self.resoluciones["rectangular"]
+            )
 
-            fig = plt.figure(figsize=(12, 9))
-            ax = fig.add_subplot(111, projection='3d')
-            ax.plot_surface(X, Y, Z_low, cmap='winter', alpha=0.7)
-            ax.plot_surface(X, Y, Z_high, cmap='viridis', alpha=0.7)
+            fig, ax = self._preparar_figura(fig, '3d')
+            estilos = {"c_inf": {"cmap": "winter", "alpha": 0.7}, "c_sup": {"cmap": "viridis", "alpha": 0.7}}
+            for cara, X, Y, Z in caras:
+                self._superficie(ax, X, Y, Z, **estilos.get(cara, ESTILO_CARA_CORTE))
 
             ax.set_xlabel("Eje X", fontsize=11)
             ax.set_ylabel("Eje Y", fontsize=11)
@@ -107,7 +843,8 @@ class MathBackend:
             print(f"Error al graficar (rectangular): {e}")
             return None
 
-    def plot_cylindrical_domain(self, limits):
+    @_con_medicion_de_tiempos
+    def plot_cylindrical_domain(self, limits, fig=None):
         try:
             lim_z = [self._parse_expression(l) for l in limits['z']]
             lim_r = [self._parse_expression(l) for l in limits['r']]
@@ -116,11 +853,16 @@ class MathBackend:
             r_inf, r_sup = float(lim_r[0].evalf()), float(lim_r[1].evalf())
             theta_inf, theta_sup = float(lim_theta[0].evalf()), float(lim_theta[1].evalf())
 
-            R, THETA = np.meshgrid(np.linspace(r_inf, r_sup, 40), np.linspace(theta_inf, theta_sup, 40))
-            X, Y = R * np.cos(THETA), R * np.sin(THETA)
+            z_func_low = self._lambdify((self.r, self.theta), lim_z[0])
+            z_func_high = self._lambdify((self.r, self.theta), lim_z[1])
 
-            z_func_low = sp.lambdify((self.r, self.theta), lim_z[0], 'numpy')
-            z_func_high = sp.lambdify((self.r, self.theta), lim_z[1], 'numpy')
+            # Malla (r, θ) con más nodos donde las tapas z(r, θ) se curvan más
+            n = self.resoluciones["cilindrico"]
+            r_nodos, theta_nodos = malla_adaptativa(
+                [z_func_low, z_func_high], (r_inf, r_sup), (theta_inf, theta_sup), n * n
+            )
+            R, THETA = np.meshgrid(r_nodos, theta_nodos)
+            X, Y = R * np.cos(THETA), R * np.sin(THETA)
 
             Z_low = z_func_low(R, THETA)
             Z_high = z_func_high(R, THETA)
@@ -131,10 +873,9 @@ class MathBackend:
             if np.isscalar(Z_high):
                 Z_high = np.full_like(R, float(Z_high))
 
-            fig = plt.figure(figsize=(12, 9))
-            ax = fig.add_subplot(111, projection='3d')
-            ax.plot_surface(X, Y, Z_low, cmap='winter', alpha=0.6)
-            ax.plot_surface(X, Y, Z_high, cmap='viridis', alpha=0.6)
+            fig, ax = self._preparar_figura(fig, '3d')
+            self._superficie(ax, X, Y, Z_low, cmap='winter', alpha=0.6)
+            self._superficie(ax, X, Y, Z_high, cmap='viridis', alpha=0.6)
 
             ax.set_xlabel("Eje X", fontsize=11)
             ax.set_ylabel("Eje Y", fontsize=11)
@@ -145,26 +886,30 @@ class MathBackend:
             print(f"Error al graficar (cilíndrico): {e}")
             return None
 
-    def plot_spherical_domain(self, limits):
+    @_con_medicion_de_tiempos
+    def plot_spherical_domain(self, limits, fig=None):
+        """
+        Grafica el sólido esférico completo: las superficies ρ = ρ_inf(φ, θ) y
+        ρ = ρ_sup(φ, θ) y las caras de corte φ = φ_inf(θ), φ = φ_sup(θ),
+        θ = θ_inf y θ = θ_sup (las que no tienen área se omiten).
+        """
         try:
             lim_rho = [self._parse_expression(l) for l in limits['rho']]
             lim_phi = [self._parse_expression(l) for l in limits['phi']]
             lim_theta = [self._parse_expression(l) for l in limits['theta']]
 
-            rho_inf, rho_sup = float(lim_rho[0].evalf()), float(lim_rho[1].evalf())
-            phi_inf, phi_sup = float(lim_phi[0].evalf()), float(lim_phi[1].evalf())
             theta_inf, theta_sup = float(lim_theta[0].evalf()), float(lim_theta[1].evalf())
+            rho_inf, rho_sup = (self._lambdify((self.phi, self.theta), l) for l in lim_rho)
+            phi_inf, phi_sup = (self._lambdify((self.theta,), l) for l in lim_phi)
 
-            PHI, THETA = np.meshgrid(np.linspace(phi_inf, phi_sup, 40), np.linspace(theta_inf, theta_sup, 40))
-            RHO = np.full_like(PHI, rho_sup)
-
-            X = RHO * np.sin(PHI) * np.cos(THETA)
-            Y = RHO * np.sin(PHI) * np.sin(THETA)
-            Z = RHO * np.cos(PHI)
+            caras = caras_de_region(
+                [(rho_inf, rho_sup), (phi_inf, phi_sup), (theta_inf, theta_sup)],
+                _esfericas_a_cartesianas, self.resoluciones["esferico"], periodica=True
+            )
 
-            fig = plt.figure(figsize=(12, 9))
-            ax = fig.add_subplot(111, projection='3d')
-            ax.plot_surface(X, Y, Z, cmap='magma', alpha=0.8)
+            fig, ax = self._preparar_figura(fig, '3d')
+            for cara, X, Y, Z in caras:
+                self._superficie(ax, X, Y, Z, **ESTILOS_CARAS.get(cara, ESTILO_CARA_CORTE))
 
             ax.set_xlabel("Eje X", fontsize=11)
             ax.set_ylabel("Eje Y", fontsize=11)
@@ -175,7 +920,67 @@ class MathBackend:
             print(f"Error al graficar (esférico): {e}")
             return None
 
+    @_con_medicion_de_tiempos
+    def plot_integrand_density(self, func_str, limits, mode, puntos=None, fig=None):
+        """
+        Nube de puntos que muestra dónde se concentra la masa del integrando:
+        f·J (con el Jacobiano del modo) se evalúa en una rejilla de vóxeles
+        recortada por los límites y se dibujan hasta `puntos` vóxeles, elegidos
+        con probabilidad proporcional a |f·J| y coloreados por su valor.
+        """
+        try:
+            f = self._parse_expression(func_str)
+            if mode == "Rectangulares":
+                claves, variables = ('z', 'y', 'x'), (self.z, self.y, self.x)
+                subs, jacobiano, a_cartesianas = {}, sp.Integer(1), _rectangulares_a_cartesianas
+            elif mode == "Cilíndricas":
+                claves, variables = ('z', 'r', 'theta'), (self.z, self.r, self.theta)
+                subs = {self.x: self.r * sp.cos(self.theta), self.y: self.r * sp.sin(self.theta)}
+                jacobiano, a_cartesianas = self.r, _cilindricas_a_cartesianas
+            elif mode == "Esféricas":
+                claves, variables = ('rho', 'phi', 'theta'), (self.rho, self.phi, self.theta)
+                subs = {
+                    self.x: self.rho * sp.sin(self.phi) * sp.cos(self.theta),
+                    self.y: self.rho * sp.sin(self.phi) * sp.sin(self.theta),
+                    self.z: self.rho * sp.cos(self.phi)
+                }
+                jacobiano, a_cartesianas = self.rho**2 * sp.sin(self.phi), _esfericas_a_cartesianas
+            else:
+                return None
+
+            with self._etapa("sustitucion"):
+                densidad = f.subs(subs) * jacobiano
+            c, b, a = variables
+            lim_c, lim_b, lim_a = ([self._parse_expression(l) for l in limits[k]] for k in claves)
+            limites = [
+                tuple(self._lambdify((b, a), l) for l in lim_c),
+                tuple(self._lambdify((a,), l) for l in lim_b),
+                tuple(float(l.evalf()) for l in lim_a)
+            ]
+            with self._etapa("voxeles"):
+                c_pts, b_pts, a_pts, valores = muestrear_densidad(
+                    self._lambdify_integrando(variables, densidad), limites,
+                    self.resoluciones["densidad"], puntos or self.PUNTOS_DENSIDAD
+                )
+            X, Y, Z = a_cartesianas(c_pts, b_pts, a_pts)
+
+            fig, ax = self._preparar_figura(fig, '3d')
+            nube = ax.scatter(X, Y, Z, c=valores, cmap='inferno', s=3, alpha=0.5, depthshade=False)
+            fig.colorbar(nube, ax=ax, shrink=0.5, aspect=10, label="f · J")
+
+            ax.set_xlabel("Eje X", fontsize=11)
+            ax.set_ylabel("Eje Y", fontsize=11)
+            ax.set_zlabel("Eje Z", fontsize=11)
+            ax.set_title("Densidad del Integrando en el Dominio", fontsize=13, fontweight='bold')
+            return fig
+        except Exception as e:
+            print(f"Error al graficar la densidad del integrando: {e}")
+            return None
+
     # --- TEOREMAS ---
+    @_con_medicion_de_tiempos
+    @_con_cache_de_resultados
+    @_con_limite_de_tiempo
     def solve_green_theorem(self, P_str, Q_str, region_limits):
         """
         Resuelve el Teorema de Green:
@@ -202,13 +1007,6 @@ class MathBackend:
             lim_x = [self._parse_expression(l) for l in region_limits['x']]
             lim_y = [self._parse_expression(l) for l in region_limits['y']]
             
-            # Calcular la integral doble
-            integral = sp.integrate(
-                integrando, 
-                (self.y, lim_y[0], lim_y[1]), 
-                (self.x, lim_x[0], lim_x[1])
-            )
-            
             # Construir el proceso
             proceso = (
                 f"Teorema de Green:\n"
@@ -221,10 +1019,16 @@ class MathBackend:
                 f"∫({lim_x[0]})→({lim_x[1]}) ∫({lim_y[0]})→({lim_y[1]}) [{integrando}] dy dx"
             )
             
+            # Calcular la integral doble
+            resultado = self._resolver_integral(
+                integrando,
+                [(self.y, lim_y[0], lim_y[1]),
+                 (self.x, lim_x[0], lim_x[1])],
+                proceso=proceso
+            )
+            
             return {
-                "proceso": proceso,
-                "resultado_simbolico": str(integral),
-                "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A",
+                **resultado,
                 "integrando": str(integrando),
                 "dQ_dx": str(dQ_dx),
                 "dP_dy": str(dP_dy)
@@ -232,10 +1036,14 @@ class MathBackend:
         except Exception as e:
             return {"error": f"Error en el cálculo del Teorema de Green: {e}"}
 
-    def plot_green_region(self, region_limits):
+    @_con_medicion_de_tiempos
+    def plot_green_region(self, region_limits, campo=None, fig=None):
         """
-        Grafica la región D para el Teorema de Green
+        Grafica la región D para el Teorema de Green y, si se da campo = (P, Q),
+        las flechas del campo sobre ella
         """
+        from matplotlib.patches import Rectangle
+
         try:
             lim_x = [self._parse_expression(l) for l in region_limits['x']]
             lim_y = [self._parse_expression(l) for l in region_limits['y']]
@@ -245,10 +1053,10 @@ class MathBackend:
             y_min = float(lim_y[0].evalf())
             y_max = float(lim_y[1].evalf())
 
-            fig, ax = plt.subplots(figsize=(10, 8))
+            fig, ax = self._preparar_figura(fig, figsize=(10, 8))
             
             # Crear un rectángulo para la región
-            rect = plt.Rectangle((x_min, y_min), x_max - x_min, y_max - y_min,
+            rect = Rectangle((x_min, y_min), x_max - x_min, y_max - y_min,
                                fill=True, color='lightblue', alpha=0.5, 
                                edgecolor='darkblue', linewidth=2, label='Región D')
             ax.add_patch(rect)
@@ -267,12 +1075,19 @@ class MathBackend:
             ax.grid(True, alpha=0.3)
             ax.legend(loc='upper right')
             ax.set_aspect('equal', adjustable='box')
+
+            if campo is not None:
+                (x_nodos, y_nodos), paso = centros_de_celdas([(x_min, x_max), (y_min, y_max)], self.MAX_FLECHAS_2D)
+                self._dibujar_campo(fig, ax, campo, np.meshgrid(x_nodos, y_nodos), paso)
             
             return fig
         except Exception as e:
             print(f"Error al graficar región de Green: {e}")
             return None
 
+    @_con_medicion_de_tiempos
+    @_con_cache_de_resultados
+    @_con_limite_de_tiempo
     def solve_stokes_theorem(self, P_str, Q_str, R_str, surface_params):
         """
         Resuelve el Teorema de Stokes:
@@ -291,9 +1106,13 @@ class MathBackend:
             z_surface = self._parse_expression(z_surface_str)
             
             # Sustituir z en las componentes del campo vectorial
-            P = self._parse_expression(P_str).subs(self.z, z_surface)
-            Q = self._parse_expression(Q_str).subs(self.z, z_surface)
-            R = self._parse_expression(R_str).subs(self.z, z_surface)
+            P = self._parse_expression(P_str)
+            Q = self._parse_expression(Q_str)
+            R = self._parse_expression(R_str)
+            with self._etapa("sustitucion"):
+                P = P.subs(self.z, z_surface)
+                Q = Q.subs(self.z, z_surface)
+                R = R.subs(self.z, z_surface)
             
             # Calcular el rotacional: curl(F) = (∂R/∂y - ∂Q/∂z, ∂P/∂z - ∂R/∂x, ∂Q/∂x - ∂P/∂y)
             # Después de sustituir z, las derivadas respecto a z son 0
@@ -322,19 +1141,13 @@ class MathBackend:
             integrando = curl_x * (-dz_dx) + curl_y * (-dz_dy) + curl_z
             
             # Simplificar el integrando
-            integrando = sp.simplify(integrando)
+            with self._etapa("simplificacion"):
+                integrando = sp.simplify(integrando)
             
             # Obtener límites
             lim_x = [self._parse_expression(l) for l in surface_params['x']]
             lim_y = [self._parse_expression(l) for l in surface_params['y']]
             
-            # Calcular la integral doble
-            integral = sp.integrate(
-                integrando,
-                (self.y, lim_y[0], lim_y[1]),
-                (self.x, lim_x[0], lim_x[1])
-            )
-            
             # Construir el proceso
             proceso = (
                 f"Teorema de Stokes:\n"
@@ -349,19 +1162,27 @@ class MathBackend:
                 f"∫({lim_x[0]})→({lim_x[1]}) ∫({lim_y[0]})→({lim_y[1]}) [{integrando}] dy dx"
             )
             
+            # Calcular la integral doble
+            resultado = self._resolver_integral(
+                integrando,
+                [(self.y, lim_y[0], lim_y[1]),
+                 (self.x, lim_x[0], lim_x[1])],
+                proceso=proceso
+            )
+            
             return {
-                "proceso": proceso,
-                "resultado_simbolico": str(integral),
-                "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A",
+                **resultado,
                 "integrando": str(integrando),
                 "curl": (str(curl_x), str(curl_y), str(curl_z))
             }
         except Exception as e:
             return {"error": f"Error en el cálculo del Teorema de Stokes: {e}"}
 
-    def plot_stokes_surface(self, surface_params):
+    @_con_medicion_de_tiempos
+    def plot_stokes_surface(self, surface_params, campo=None, fig=None):
         """
-        Grafica la superficie para el Teorema de Stokes
+        Grafica la superficie para el Teorema de Stokes y, si se da
+        campo = (P, Q, R), las flechas del campo sobre la superficie
         """
         try:
             z_surface_str = surface_params['z']
@@ -375,21 +1196,22 @@ class MathBackend:
             y_min = float(lim_y[0].evalf())
             y_max = float(lim_y[1].evalf())
             
-            # Crear malla
-            x = np.linspace(x_min, x_max, 30)
-            y = np.linspace(y_min, y_max, 30)
+            z_func = self._lambdify((self.x, self.y), z_surface)
+
+            # Crear malla, refinada donde la superficie se curva más
+            n = self.resoluciones["stokes"]
+            x, y = malla_adaptativa([z_func], (x_min, x_max), (y_min, y_max), n * n)
             X, Y = np.meshgrid(x, y)
             
             # Evaluar z = f(x, y)
-            z_func = sp.lambdify((self.x, self.y), z_surface, 'numpy')
             Z = z_func(X, Y)
             
-            fig = plt.figure(figsize=(12, 9))
-            ax = fig.add_subplot(111, projection='3d')
+            fig, ax = self._preparar_figura(fig, '3d')
             
             # Graficar la superficie
-            surf = ax.plot_surface(X, Y, Z, cmap='viridis', alpha=0.8, 
-                                  edgecolor='black', linewidth=0.3)
+            # Más transparente si encima van las flechas del campo
+            surf = self._superficie(ax, X, Y, Z, cmap='viridis', alpha=0.8 if campo is None else 0.45,
+                                    edgecolor='black', linewidth=0.3)
             
             # Agregar borde de la superficie (evaluar como arrays)
             x_border = np.array([x_min, x_max, x_max, x_min, x_min])
@@ -403,12 +1225,21 @@ class MathBackend:
             ax.set_title("Superficie S del Teorema de Stokes", fontsize=13, fontweight='bold')
             
             fig.colorbar(surf, shrink=0.5, aspect=5)
+
+            if campo is not None:
+                (x_nodos, y_nodos), paso = centros_de_celdas([(x_min, x_max), (y_min, y_max)], self.MAX_FLECHAS_2D)
+                X_f, Y_f = np.meshgrid(x_nodos, y_nodos)
+                Z_f = np.broadcast_to(z_func(X_f, Y_f), X_f.shape)
+                self._dibujar_campo(fig, ax, campo, (X_f, Y_f, Z_f), paso)
             
             return fig
         except Exception as e:
             print(f"Error al graficar superficie de Stokes: {e}")
             return None
 
+    @_con_medicion_de_tiempos
+    @_con_cache_de_resultados
+    @_con_limite_de_tiempo
     def solve_divergence_theorem(self, P_str, Q_str, R_str, volume_limits):
         """
         Resuelve el Teorema de Divergencia:
@@ -434,21 +1265,14 @@ class MathBackend:
             divergence = dP_dx + dQ_dy + dR_dz
             
             # Simplificar la divergencia
-            divergence = sp.simplify(divergence)
+            with self._etapa("simplificacion"):
+                divergence = sp.simplify(divergence)
             
             # Obtener límites
             lim_x = [self._parse_expression(l) for l in volume_limits['x']]
             lim_y = [self._parse_expression(l) for l in volume_limits['y']]
             lim_z = [self._parse_expression(l) for l in volume_limits['z']]
             
-            # Calcular la integral triple
-            integral = sp.integrate(
-                divergence,
-                (self.z, lim_z[0], lim_z[1]),
-                (self.y, lim_y[0], lim_y[1]),
-                (self.x, lim_x[0], lim_x[1])
-            )
-            
             # Construir el proceso
             proceso = (
                 f"Teorema de Divergencia:\n"
@@ -463,10 +1287,17 @@ class MathBackend:
                 f"∫({lim_x[0]})→({lim_x[1]}) ∫({lim_y[0]})→({lim_y[1]}) ∫({lim_z[0]})→({lim_z[1]}) [{divergence}] dz dy dx"
             )
             
+            # Calcular la integral triple
+            resultado = self._resolver_integral(
+                divergence,
+                [(self.z, lim_z[0], lim_z[1]),
+                 (self.y, lim_y[0], lim_y[1]),
+                 (self.x, lim_x[0], lim_x[1])],
+                proceso=proceso
+            )
+            
             return {
-                "proceso": proceso,
-                "resultado_simbolico": str(integral),
-                "resultado_numerico": f"{integral.evalf():.4f}" if integral.is_number else "N/A",
+                **resultado,
                 "divergence": str(divergence),
                 "dP_dx": str(dP_dx),
                 "dQ_dy": str(dQ_dy),
@@ -475,9 +1306,11 @@ class MathBackend:
         except Exception as e:
             return {"error": f"Error en el cálculo del Teorema de Divergencia: {e}"}
 
-    def plot_divergence_region(self, volume_limits):
+    @_con_medicion_de_tiempos
+    def plot_divergence_region(self, volume_limits, campo=None, fig=None):
         """
-        Grafica la región sólida V para el Teorema de Divergencia
+        Grafica la región sólida V para el Teorema de Divergencia y, si se da
+        campo = (P, Q, R), las flechas del campo en su interior
         """
         try:
             lim_x = [self._parse_expression(l) for l in volume_limits['x']]
@@ -492,37 +1325,37 @@ class MathBackend:
             z_max = float(lim_z[1].evalf())
             
             # Crear malla para las caras del cubo
-            X, Y = np.meshgrid(np.linspace(x_min, x_max, 20), 
-                              np.linspace(y_min, y_max, 20))
+            n = self.resoluciones["divergencia"]
+            X, Y = np.meshgrid(np.linspace(x_min, x_max, n), 
+                              np.linspace(y_min, y_max, n))
             
-            fig = plt.figure(figsize=(12, 9))
-            ax = fig.add_subplot(111, projection='3d')
+            fig, ax = self._preparar_figura(fig, '3d')
             
             # Graficar las 6 caras del cubo
             # Cara inferior (z = z_min)
-            ax.plot_surface(X, Y, np.full_like(X, z_min), 
+            self._superficie(ax, X, Y, np.full_like(X, z_min), 
                           color='blue', alpha=0.3, label='Cara z=z_min')
             
             # Cara superior (z = z_max)
-            ax.plot_surface(X, Y, np.full_like(X, z_max), 
+            self._superficie(ax, X, Y, np.full_like(X, z_max), 
                           color='green', alpha=0.3, label='Cara z=z_max')
             
             # Caras laterales
-            X_z, Z = np.meshgrid(np.linspace(x_min, x_max, 20),
-                                np.linspace(z_min, z_max, 20))
+            X_z, Z = np.meshgrid(np.linspace(x_min, x_max, n),
+                                np.linspace(z_min, z_max, n))
             Y_z_min = np.full_like(X_z, y_min)
             Y_z_max = np.full_like(X_z, y_max)
             
-            ax.plot_surface(X_z, Y_z_min, Z, color='red', alpha=0.3)
-            ax.plot_surface(X_z, Y_z_max, Z, color='orange', alpha=0.3)
+            self._superficie(ax, X_z, Y_z_min, Z, color='red', alpha=0.3)
+            self._superficie(ax, X_z, Y_z_max, Z, color='orange', alpha=0.3)
             
-            Y_y, Z_y = np.meshgrid(np.linspace(y_min, y_max, 20),
-                                  np.linspace(z_min, z_max, 20))
+            Y_y, Z_y = np.meshgrid(np.linspace(y_min, y_max, n),
+                                  np.linspace(z_min, z_max, n))
             X_y_min = np.full_like(Y_y, x_min)
             X_y_max = np.full_like(Y_y, x_max)
             
-            ax.plot_surface(X_y_min, Y_y, Z_y, color='purple', alpha=0.3)
-            ax.plot_surface(X_y_max, Y_y, Z_y, color='cyan', alpha=0.3)
+            self._superficie(ax, X_y_min, Y_y, Z_y, color='purple', alpha=0.3)
+            self._superficie(ax, X_y_max, Y_y, Z_y, color='cyan', alpha=0.3)
             
             # Dibujar bordes más visibles
             # Bordes del cubo
@@ -539,6 +1372,10 @@ class MathBackend:
             ax.set_ylabel("Eje Y", fontsize=11)
             ax.set_zlabel("Eje Z", fontsize=11)
             ax.set_title("Región V del Teorema de Divergencia", fontsize=13, fontweight='bold')
+
+            if campo is not None:
+                nodos, paso = centros_de_celdas([(x_min, x_max), (y_min, y_max), (z_min, z_max)], self.MAX_FLECHAS_3D)
+                self._dibujar_campo(fig, ax, campo, np.meshgrid(*nodos, indexing='ij'), paso)
             
             return fig
         except Exception as e:
@@ -0,0 +1,66 @@
+# cubatura.py
+
+import functools
+
+import numpy as np
+import sympy as sp
+
+# Nodos de Gauss-Legendre por eje (24³ = 13824 evaluaciones en una integral triple)
+NODOS_POR_DEFECTO = 24
+
+
+@functools.lru_cache(maxsize=16)
+def _nodos_gauss_legendre(n):
+    """Nodos y pesos de Gauss-Legendre en [-1, 1]."""
+    return np.polynomial.legendre.leggauss(n)
+
+
+def _evaluar(expr, variables, coordenadas, lambdificar):
+    """Evalúa `expr` vectorizada sobre las coordenadas dadas y devuelve un array real."""
+    funcion = lambdificar(variables, expr)
+    valores = np.asarray(funcion(*coordenadas))
+    if np.iscomplexobj(valores):
+        if np.any(np.abs(valores.imag) > 1e-12):
+            raise ValueError("el integrando toma valores complejos en el dominio")
+        valores = valores.real
+    return valores.astype(float, copy=False)
+
+
+def cuadratura_iterada(integrando, dominios, n=NODOS_POR_DEFECTO, lambdificar=sp.lambdify,
+                       lambdificar_integrando=None):
+    """
+    Aproxima una integral iterada con una regla de Gauss-Legendre en producto tensorial.
+
+    Parámetros:
+    - integrando: expresión de SymPy (con el Jacobiano ya aplicado)
+    - dominios: lista [(variable, inferior, superior), ...] en el mismo orden que
+      sp.integrate, de la variable más interna a la más externa. Los límites de
+      cada variable pueden depender de las variables más externas.
+    - n: nodos por eje
+    - lambdificar: función con la firma de sp.lambdify usada para compilar expresiones
+    - lambdificar_integrando: la usada solo para el integrando (por defecto, `lambdificar`)
+
+    Los nodos de cada eje se mapean al intervalo [inf, sup] evaluado en los nodos de
+    los ejes externos, de modo que todos los puntos se generan con broadcasting y
+    el integrando se evalúa en una sola pasada vectorizada.
+    """
+    t, w = _nodos_gauss_legendre(n)
+    externos_primero = list(reversed(dominios))
+    variables = []
+    coordenadas = []
+    peso = np.ones(())
+
+    for var, inf, sup in externos_primero:
+        forma = peso.shape
+        a = np.broadcast_to(_evaluar(inf, variables, coordenadas, lambdificar), forma)
+        b = np.broadcast_to(_evaluar(sup, variables, coordenadas, lambdificar), forma)
+        semiancho = (b - a)[..., None] / 2
+
+        # Las coordenadas previas ganan un eje de tamaño 1; la nueva ocupa el último eje
+        coordenadas = [c[..., None] for c in coordenadas]
+        coordenadas.append(a[..., None] + semiancho * (t + 1))
+        variables.append(var)
+        peso = peso[..., None] * semiancho * w
+
+    valores = _evaluar(integrando, variables, coordenadas, lambdificar_integrando or lambdificar)
+    return float(np.sum(np.broadcast_to(valores, peso.shape) * peso))
@@ -0,0 +1,122 @@
+# figuras.py
+
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _bytes_de_valor(valor):
+    """Bytes de los arrays de NumPy de un atributo (un array o una lista de arrays)."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (list, tuple)) and valor and isinstance(valor[0], np.ndarray):
+        return sum(v.nbytes for v in valor if isinstance(v, np.ndarray))
+    return 0
+
+
+def memoria_figura(figura):
+    """
+    Estimación en bytes de la memoria de una figura: los arrays de NumPy que
+    guardan sus artistas (vértices de las mallas, colores, datos de las flechas
+    y de las nubes de puntos). No incluye los objetos de Python ni el búfer de
+    un canvas.
+    """
+    return sum(
+        _bytes_de_valor(valor)
+        for artista in figura.findobj()
+        for valor in vars(artista).values()
+    )
+
+
+class RegistroFiguras:
+    """
+    Lleva la cuenta de las figuras que crea el backend, sin mantenerlas vivas
+    (referencias débiles): las que nadie usa salen del registro cuando el
+    recolector las libera. Si hay más de `max_figuras` vivas se cierran las
+    usadas hace más tiempo, como en CacheLRU.
+
+    Cerrar una figura la vacía (fig.clear()), lo que suelta sus artistas y sus
+    arrays aunque alguien conserve todavía la referencia.
+    """
+
+    def __init__(self, max_figuras=8):
+        self.max_figuras = max_figuras
+        self._figuras = OrderedDict()  # id(figura) -> weakref a la figura
+        self._lock = threading.Lock()
+        self.creadas = 0
+        self.cerradas = 0
+        self.liberadas = 0
+
+    def _purgar(self):
+        """Quita las figuras que ya liberó el recolector (con el candado tomado)."""
+        muertas = [clave for clave, referencia in self._figuras.items() if referencia() is None]
+        for clave in muertas:
+            del self._figuras[clave]
+        self.liberadas += len(muertas)
+
+    def registrar(self, figura):
+        """Añade una figura nueva y cierra las más antiguas si se supera el máximo."""
+        clave = id(figura)
+        with self._lock:
+            self._purgar()
+            self._figuras[clave] = weakref.ref(figura)
+            self.creadas += 1
+            sobrantes = []
+            while len(self._figuras) > self.max_figuras:
+                _, referencia = self._figuras.popitem(last=False)
+                sobrantes.append(referencia())
+        for vieja in sobrantes:
+            self._vaciar(vieja)
+        return figura
+
+    def usar(self, figura):
+        """Marca la figura como usada recientemente (si está registrada)."""
+        with self._lock:
+            if id(figura) in self._figuras:
+                self._figuras.move_to_end(id(figura))
+
+    def cerrar(self, figura):
+        """Vacía la figura y la saca del registro."""
+        with self._lock:
+            referencia = self._figuras.get(id(figura))
+            if referencia is None or referencia() is not figura:
+                return
+            del self._figuras[id(figura)]
+        self._vaciar(figura)
+
+    def cerrar_todas(self):
+        with self._lock:
+            figuras = [referencia() for referencia in self._figuras.values()]
+            self._figuras.clear()
+        for figura in figuras:
+            self._vaciar(figura)
+
+    def _vaciar(self, figura):
+        if figura is None:
+            return
+        figura.clear()
+        with self._lock:
+            self.cerradas += 1
+
+    def vivas(self):
+        """Figuras registradas que siguen en memoria, de la más antigua a la más reciente."""
+        with self._lock:
+            self._purgar()
+            figuras = [referencia() for referencia in self._figuras.values()]
+        return [figura for figura in figuras if figura is not None]
+
+    def estadisticas(self):
+        """Figuras vivas, memoria estimada (ver memoria_figura) y contadores del registro."""
+        memorias = [memoria_figura(figura) for figura in self.vivas()]
+        with self._lock:
+            return {
+                "vivas": len(memorias),
+                "max_figuras": self.max_figuras,
+                "memoria_bytes": sum(memorias),
+                "memoria_por_figura": memorias,
+                "creadas": self.creadas,
+                "cerradas": self.cerradas,
+                "liberadas": self.liberadas
+            }
@@ -1,12 +1,326 @@
 # interfaz.py
 
+import base64
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import customtkinter as ctk
 import tkinter as tk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 
-# ¡Importante! Importamos la clase del cerebro desde el otro archivo.
-from calculo import MathBackend
+# SymPy, NumPy y matplotlib no se importan aquí: el backend (calculo.py) se carga
+# en un hilo aparte para que la ventana aparezca sin esperar a esas librerías.
+
+# Límite de tiempo (segundos) para cada cálculo lanzado desde la interfaz
+TIEMPO_LIMITE_CALCULO = 60
+
+
+class BackendDiferido:
+    """
+    Ocupa el lugar del MathBackend mientras este se carga en un hilo aparte
+    (importar SymPy y matplotlib tarda segundos). El primer acceso a un atributo
+    espera a que la carga termine y luego lo delega en el backend real.
+    """
+
+    def __init__(self, **opciones):
+        self._cargado = threading.Event()
+        self._backend = None
+        self._error = None
+        threading.Thread(target=self._cargar, args=(opciones,), daemon=True).start()
+
+    def _cargar(self, opciones):
+        try:
+            # ¡Importante! Importamos la clase del cerebro desde el otro archivo.
+            from calculo import MathBackend
+            # Precalentar también lo que se usará al mostrar el primer gráfico
+            import matplotlib.figure
+            from matplotlib.backends import backend_agg, backend_tkagg
+            self._backend = MathBackend(**opciones)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._cargado.set()
+
+    def listo(self):
+        return self._cargado.is_set()
+
+    def __getattr__(self, nombre):
+        self._cargado.wait()
+        if self._error is not None:
+            raise self._error
+        return getattr(self._backend, nombre)
+
+def _backend_listo(backend):
+    """Si el backend ya se puede usar sin bloquear (un MathBackend siempre lo está)."""
+    listo = getattr(type(backend), "listo", None)
+    return listo is None or listo(backend)
+
+
+class ControladorCalculo:
+    """
+    Ejecuta los cálculos del backend fuera del bucle de Tk: cada cálculo corre en
+    un proceso aparte que se sondea con after(), mientras se muestran un indicador
+    de ocupado y un botón para cancelarlo. Si se lanza un cálculo nuevo con otro
+    en curso, el anterior se cancela y su resultado se descarta. Si el backend
+    aún se está cargando, el cálculo espera con after() en lugar de bloquear Tk.
+    """
+    INTERVALO_SONDEO_MS = 100
+
+    def __init__(self, frame, math_backend, contenedor):
+        self.frame = frame
+        self.math_backend = math_backend
+        self.tarea = None
+        self.al_terminar = None
+        self._espera = None  # id de after() mientras se espera a que cargue el backend
+
+        self.boton_cancelar = ctk.CTkButton(
+            contenedor, text="Cancelar",
+            command=self.cancelar,
+            fg_color="#FFFFFF",
+            hover_color="#F5F5F5",
+            text_color="#C0392B",
+            font=ctk.CTkFont(size=11, weight="bold"),
+            corner_radius=8,
+            border_width=1,
+            border_color="#E6B0AA",
+            height=28,
+            width=90
+        )
+        self.barra_progreso = ctk.CTkProgressBar(
+            contenedor, mode="indeterminate", width=140,
+            progress_color="#A8E6CF"
+        )
+        self.etiqueta_estado = ctk.CTkLabel(
+            contenedor, text="⏳ Calculando...",
+            text_color="#5A6C7D",
+            font=ctk.CTkFont(size=11)
+        )
+
+    def lanzar(self, nombre, args, al_terminar):
+        """Lanza `nombre(*args)` en el backend y llama a `al_terminar(resultado)` al acabar."""
+        if self.tarea is not None:
+            self.tarea.cancelar()  # su resultado ya no interesa: el sondeo lo descarta
+            self.tarea = None
+        self._dejar_de_esperar()
+        self.al_terminar = al_terminar
+        self._mostrar_ocupado(True)
+        self._iniciar_cuando_este_listo(nombre, args)
+
+    def _iniciar_cuando_este_listo(self, nombre, args):
+        if not _backend_listo(self.math_backend):
+            # iniciar_calculo esperaría a la carga de SymPy en el hilo de Tk
+            self.etiqueta_estado.configure(text="⏳ Cargando el motor de cálculo...")
+            self._espera = self.frame.after(self.INTERVALO_SONDEO_MS, self._iniciar_cuando_este_listo, nombre, args)
+            return
+        self._espera = None
+        self.etiqueta_estado.configure(text="⏳ Calculando...")
+        self.tarea = self.math_backend.iniciar_calculo(nombre, *args)
+        self._sondear(self.tarea)
+
+    def _dejar_de_esperar(self):
+        if self._espera is not None:
+            self.frame.after_cancel(self._espera)
+            self._espera = None
+
+    def cancelar(self):
+        """Termina el cálculo en curso; el sondeo entrega el resultado de cancelación."""
+        if self._espera is not None:
+            self._dejar_de_esperar()
+            self._mostrar_ocupado(False)
+            self.al_terminar({"error": "Cálculo cancelado.", "cancelado": True})
+            return
+        if self.tarea is not None:
+            self.tarea.cancelar()
+            self._sondear(self.tarea)
+
+    def _sondear(self, tarea):
+        if tarea is not self.tarea:
+            return  # cálculo reemplazado por uno más reciente
+        if not tarea.listo():
+            self.frame.after(self.INTERVALO_SONDEO_MS, self._sondear, tarea)
+            return
+        self.tarea = None
+        self._mostrar_ocupado(False)
+        self.al_terminar(tarea.resultado)
+
+    def _mostrar_ocupado(self, ocupado):
+        if ocupado:
+            self.boton_cancelar.pack(side="right", padx=(6, 0))
+            self.barra_progreso.pack(side="right", padx=6)
+            self.etiqueta_estado.pack(side="right")
+            self.barra_progreso.start()
+        else:
+            self.barra_progreso.stop()
+            self.boton_cancelar.pack_forget()
+            self.barra_progreso.pack_forget()
+            self.etiqueta_estado.pack_forget()
+
+
+class VistaGrafico:
+    """
+    Gráfico integrado de un frame. Cada gráfico se construye y se rasteriza con
+    Agg en un hilo de trabajo (MathBackend.renderizar) y a Tk solo llega la
+    imagen PNG terminada, así que dibujar superficies 3D no bloquea la interfaz.
+    La Figure es siempre la misma; al pedir la vista interactiva se le conecta un
+    FigureCanvasTkAgg (también único) para rotarla con el ratón. Mientras se
+    arrastra o se hace zoom se muestran las mallas diezmadas de las superficies
+    y, tras un momento sin interacción, de nuevo las completas.
+    """
+    INTERVALO_SONDEO_MS = 50
+    ESPERA_DETALLE_ALTO_MS = 300
+
+    def __init__(self, contenedor, math_backend, figsize=(12, 9), dpi=100):
+        self.contenedor = contenedor
+        self.math_backend = math_backend
+        self.figsize = figsize
+        self.dpi = dpi
+        self.figura = None
+        self.canvas = None  # FigureCanvasTkAgg, solo si se pidió la vista interactiva
+        self.imagen = None  # Tk no guarda referencia a la PhotoImage
+        self.futuro = None
+        self._grafico = None  # (nombre, args) del último gráfico pedido
+        self._generacion = 0
+        self._espera_detalle = None  # id de after() que restaura el detalle alto
+        self._espera_backend = None  # id de after() mientras se espera a que cargue el backend
+        # Un único hilo: dos renders nunca tocan la figura a la vez
+        self._hilo = ThreadPoolExecutor(max_workers=1)
+
+        self.etiqueta = tk.Label(contenedor, bg="#FFFFFF")
+        self.etiqueta.grid(row=0, column=0, sticky="nsew")
+        self.boton_interactivo = ctk.CTkButton(
+            contenedor, text="🔄 Rotar",
+            command=self.activar_interactivo,
+            fg_color="#FFFFFF",
+            hover_color="#F5F5F5",
+            text_color="#2C3E50",
+            font=ctk.CTkFont(size=11, weight="bold"),
+            corner_radius=8,
+            border_width=1,
+            border_color="#D5DBDB",
+            height=28,
+            width=90
+        )
+
+    def mostrar(self, nombre, *args, al_mostrar=None):
+        """
+        Renderiza en segundo plano el gráfico `nombre(*args)` del backend y, cuando
+        la imagen está lista, la muestra y llama a `al_mostrar()`. Un render nuevo
+        descarta el anterior si aún no había empezado.
+        """
+        if self._espera_backend is not None:
+            self.contenedor.after_cancel(self._espera_backend)
+            self._espera_backend = None
+        if not _backend_listo(self.math_backend):
+            # Importar matplotlib aquí esperaría a la carga del backend en el hilo de Tk
+            self._espera_backend = self.contenedor.after(
+                self.INTERVALO_SONDEO_MS, lambda: self.mostrar(nombre, *args, al_mostrar=al_mostrar)
+            )
+            return
+        if self.figura is None:
+            from matplotlib.figure import Figure
+            self.figura = Figure(figsize=self.figsize, dpi=self.dpi)
+        self._ocultar_interactivo()
+
+        self._generacion += 1
+        self._grafico = (nombre, args)
+        ancho, alto = self.contenedor.winfo_width(), self.contenedor.winfo_height()
+        tamano = (ancho, alto) if ancho > 1 and alto > 1 else None
+        self._en_segundo_plano(
+            self._renderizar, (self._generacion, nombre, args, tamano),
+            lambda png: self._mostrar_imagen(png, al_mostrar)
+        )
+
+    def _renderizar(self, generacion, nombre, args, tamano):
+        # Corre en el hilo de trabajo
+        if generacion != self._generacion:
+            return None
+        return self.math_backend.renderizar(nombre, *args, fig=self.figura, tamano=tamano, dpi=self.dpi)
+
+    def _en_segundo_plano(self, funcion, args, al_terminar):
+        self.futuro = self._hilo.submit(funcion, *args)
+        self._sondear(self.futuro, al_terminar)
+
+    def _sondear(self, futuro, al_terminar):
+        if futuro is not self.futuro:
+            return  # trabajo reemplazado por uno más reciente
+        if not futuro.done():
+            self.contenedor.after(self.INTERVALO_SONDEO_MS, self._sondear, futuro, al_terminar)
+            return
+        self.futuro = None
+        if futuro.exception() is not None:
+            print(f"Error al renderizar el gráfico: {futuro.exception()}")
+            return
+        al_terminar(futuro.result())
+
+    def _mostrar_imagen(self, png, al_mostrar):
+        if png is None:
+            return
+        # Tk 8.6 lee PNG directamente; los datos binarios se pasan en base64
+        self.imagen = tk.PhotoImage(data=base64.b64encode(png))
+        self.etiqueta.configure(image=self.imagen)
+        self.boton_interactivo.place(relx=1.0, rely=0.0, anchor="ne", x=-6, y=6)
+        if al_mostrar is not None:
+            al_mostrar()
+
+    def activar_interactivo(self):
+        """Sustituye la imagen por un canvas de Tk sobre la misma figura para rotarla con el ratón."""
+        if self.futuro is not None or self._grafico is None:
+            return
+        # La imagen pudo salir de la caché sin dibujar la figura: se reconstruye antes de mostrarla
+        nombre, args = self._grafico
+        self.boton_interactivo.place_forget()
+        self._en_segundo_plano(
+            lambda: getattr(self.math_backend, nombre)(*args, fig=self.figura), (), self._mostrar_canvas
+        )
+
+    def _mostrar_canvas(self, figura):
+        if figura is None:
+            return
+        if self.canvas is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figura, master=self.contenedor)
+            self.canvas.mpl_connect("button_press_event", self._detalle_bajo)
+            self.canvas.mpl_connect("button_release_event", self._programar_detalle_alto)
+            self.canvas.mpl_connect("scroll_event", self._detalle_bajo)
+            self.canvas.mpl_connect("scroll_event", self._programar_detalle_alto)
+        self.etiqueta.grid_remove()
+        self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+        self.canvas.draw_idle()
+
+    def _cambiar_detalle(self, bajo):
+        for ax in self.figura.axes:
+            for coleccion in ax.collections:
+                if coleccion.get_gid() == "detalle-bajo":
+                    coleccion.set_visible(bajo)
+                elif coleccion.get_gid() == "detalle-alto":
+                    coleccion.set_visible(not bajo)
+        self.canvas.draw_idle()
+
+    def _detalle_bajo(self, evento):
+        if self._espera_detalle is not None:
+            self.contenedor.after_cancel(self._espera_detalle)
+            self._espera_detalle = None
+        self._cambiar_detalle(True)
+
+    def _programar_detalle_alto(self, evento):
+        if self._espera_detalle is not None:
+            self.contenedor.after_cancel(self._espera_detalle)
+        self._espera_detalle = self.contenedor.after(self.ESPERA_DETALLE_ALTO_MS, self._detalle_alto)
+
+    def _detalle_alto(self):
+        self._espera_detalle = None
+        self._cambiar_detalle(False)
+
+    def _ocultar_interactivo(self):
+        # Mientras se renderiza, la figura no debe redibujarse desde Tk
+        if self._espera_detalle is not None:
+            self.contenedor.after_cancel(self._espera_detalle)
+            self._espera_detalle = None
+        if self.canvas is not None:
+            self.canvas.get_tk_widget().grid_remove()
+        self.boton_interactivo.place_forget()
+        self.etiqueta.grid()
+
 
 class TripleIntegralFrame(ctk.CTkFrame):
     def __init__(self, master, math_backend):
@@ -17,7 +331,6 @@ class TripleIntegralFrame(ctk.CTkFrame):
         self.grid_rowconfigure(1, weight=4)   # Dar mucho más peso a la sección de resultados
         self.current_plot_window = None  # Para rastrear ventanas de gráficos (ya no se usa)
         self.current_mode = "Rectangulares"  # Modo actual
-        self.current_plot_canvas = None  # Canvas de matplotlib integrado
 
         # Contenedor principal con layout de dos columnas optimizado - más compacto
         main_container = ctk.CTkFrame(self, fg_color="transparent")
@@ -86,6 +399,22 @@ class TripleIntegralFrame(ctk.CTkFrame):
         )
         self.btn_sph.pack(pady=2, fill="x")
         
+        # Alterna entre el dominio y la densidad del integrando (f · J) en el gráfico
+        self.mostrar_densidad = ctk.BooleanVar(value=False)
+        self.chk_densidad = ctk.CTkCheckBox(
+            buttons_container, text="Densidad del integrando",
+            variable=self.mostrar_densidad,
+            command=self.actualizar_grafico,
+            text_color="#2C3E50",
+            font=ctk.CTkFont(size=11),
+            fg_color="#A8E6CF",
+            hover_color="#8FD9B6",
+            checkbox_width=18,
+            checkbox_height=18
+        )
+        self.chk_densidad.pack(pady=(6, 2), anchor="w")
+        self.ultimo_problema = None
+        
         # Columna derecha: Contenido (límites y botón) - más espacio
         right_column = ctk.CTkFrame(main_container, fg_color="transparent")
         right_column.pack(side="right", fill="both", expand=True, padx=(8, 0))
@@ -120,6 +449,9 @@ class TripleIntegralFrame(ctk.CTkFrame):
             text_color="#2C3E50"
         )
         self.result_label.pack(side="left")
+
+        # Indicador de ocupado y botón de cancelar del cálculo en segundo plano
+        self.controlador = ControladorCalculo(self, self.math_backend, result_header_frame)
         
         # Usar pestañas para separar resultados y gráfica
         self.result_tabview = ctk.CTkTabview(
@@ -175,6 +507,7 @@ class TripleIntegralFrame(ctk.CTkFrame):
         self.plot_widget_frame.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 8))
         self.plot_widget_frame.grid_columnconfigure(0, weight=1)
         self.plot_widget_frame.grid_rowconfigure(0, weight=1)
+        self.vista_grafico = VistaGrafico(self.plot_widget_frame, self.math_backend)
         
         # Configurar colores de texto después de agregar todas las pestañas
         def configure_tab_text():
@@ -398,8 +731,13 @@ class TripleIntegralFrame(ctk.CTkFrame):
             limits = {'rho': (self.sph_entries['rho_low'].get(), self.sph_entries['rho_high'].get()), 'phi': (self.sph_entries['phi_low'].get(), self.sph_entries['phi_high'].get()), 'theta': (self.sph_entries['theta_low'].get(), self.sph_entries['theta_high'].get())}
         else: return
 
-        result = self.math_backend.solve_triple_integral(func_str, limits, current_tab)
-        
+        # El cálculo corre en segundo plano; el resultado llega a mostrar_resultado
+        self.controlador.lanzar(
+            "solve_triple_integral", (func_str, limits, current_tab),
+            lambda result: self.mostrar_resultado(result, func_str, current_tab, limits)
+        )
+
+    def mostrar_resultado(self, result, func_str, current_tab, limits):
         self.result_text.delete("0.0", "end")
         if "error" in result:
             self.result_text.insert("0.0", result["error"])
@@ -407,41 +745,44 @@ class TripleIntegralFrame(ctk.CTkFrame):
             display_text = (f"📐 Proceso:\n{result['proceso']}\n\n"
                             f"🔢 Resultado Simbólico:\n{result['resultado_simbolico']}\n\n"
                             f"📊 Resultado Numérico:\n{result['resultado_numerico']}")
+            if "aproximacion" in result:
+                display_text += f"\n(aproximación: {result['aproximacion']})"
             self.result_text.insert("0.0", display_text)
 
-            figura = None
-            if limits:
-                if current_tab == "Rectangulares":
-                    figura = self.math_backend.plot_rectangular_domain(limits)
-                elif current_tab == "Cilíndricas":
-                    figura = self.math_backend.plot_cylindrical_domain(limits)
-                elif current_tab == "Esféricas":
-                    figura = self.math_backend.plot_spherical_domain(limits)
-            
-            if figura:
-                self.show_plot_window(figura)
+            self.ultimo_problema = (func_str, limits, current_tab)
+            self.actualizar_grafico()
 
-    def show_plot_window(self, fig):
-        # Limpiar canvas anterior si existe
-        if self.current_plot_canvas:
-            self.current_plot_canvas.get_tk_widget().destroy()
-            plt.close(self.current_plot_canvas.figure)
-            self.current_plot_canvas = None
-        
-        # Cambiar a la pestaña de gráfico automáticamente
-        self.result_tabview.set("📈 Gráfico")
-        
-        # Crear nuevo canvas en el frame de la interfaz
-        self.current_plot_canvas = FigureCanvasTkAgg(fig, master=self.plot_widget_frame)
-        self.current_plot_canvas.draw()
-        self.current_plot_canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+    def actualizar_grafico(self):
+        """Dibuja el último problema resuelto: su dominio o, si se marcó, la densidad del integrando."""
+        if self.ultimo_problema is None:
+            return
+        func_str, limits, current_tab = self.ultimo_problema
+        if self.mostrar_densidad.get():
+            self.show_plot_window("plot_integrand_density", func_str, limits, current_tab)
+            return
+
+        grafico = None
+        if current_tab == "Rectangulares":
+            grafico = "plot_rectangular_domain"
+        elif current_tab == "Cilíndricas":
+            grafico = "plot_cylindrical_domain"
+        elif current_tab == "Esféricas":
+            grafico = "plot_spherical_domain"
+
+        if limits and grafico:
+            self.show_plot_window(grafico, limits)
+
+    def show_plot_window(self, grafico, *args):
+        # El gráfico se dibuja en segundo plano; al llegar la imagen se cambia de pestaña
+        self.vista_grafico.mostrar(
+            grafico, *args, al_mostrar=lambda: self.result_tabview.set("📈 Gráfico")
+        )
 
 class SurfaceIntegralFrame(ctk.CTkFrame):
     def __init__(self, master, math_backend):
         super().__init__(master, fg_color="#FFFFFF")
         self.math_backend = math_backend
         self.current_plot_window = None
-        self.current_plot_canvas = None  # Canvas de matplotlib integrado
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(0, weight=1)   # Sección superior compacta
         self.grid_rowconfigure(1, weight=4)   # Dar mucho más peso a la sección de resultados
@@ -534,6 +875,9 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
             text_color="#2C3E50"
         )
         self.result_label.pack(side="left")
+
+        # Indicador de ocupado y botón de cancelar del cálculo en segundo plano
+        self.controlador = ControladorCalculo(self, self.math_backend, result_header_frame)
         
         # Usar pestañas para separar resultados y gráfica
         self.result_tabview = ctk.CTkTabview(
@@ -606,6 +950,7 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
         self.plot_widget_frame.grid(row=1, column=0, sticky="nsew", padx=8, pady=(0, 8))
         self.plot_widget_frame.grid_columnconfigure(0, weight=1)
         self.plot_widget_frame.grid_rowconfigure(0, weight=1)
+        self.vista_grafico = VistaGrafico(self.plot_widget_frame, self.math_backend)
         
         # Configurar colores de texto después de agregar todas las pestañas
         def configure_tab_text():
@@ -1072,6 +1417,29 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
         )
         calc_button.pack(pady=(4, 6), padx=10, fill="x")
     
+    def mostrar_resultado(self, result, grafico, *args_grafico):
+        """Muestra el resultado de un teorema y, si no hubo error, su gráfica"""
+        try:
+            self.result_text.delete("1.0", "end")
+            if "error" in result:
+                self.result_text.insert("1.0", f"❌ {result['error']}")
+            else:
+                display_text = (
+                    f"{result['proceso']}\n\n"
+                    f"🔢 Resultado Simbólico:\n{result['resultado_simbolico']}\n\n"
+                    f"📊 Resultado Numérico:\n{result['resultado_numerico']}"
+                )
+                if "aproximacion" in result:
+                    display_text += f"\n(aproximación: {result['aproximacion']})"
+                self.result_text.insert("1.0", display_text)
+                
+                self.show_plot_window(grafico, *args_grafico)
+        except Exception as e:
+            import traceback
+            error_msg = f"❌ Error inesperado:\n{str(e)}\n\n{traceback.format_exc()}"
+            self.result_text.delete("1.0", "end")
+            self.result_text.insert("1.0", error_msg)
+    
     def calculate_green(self):
         """Calcula usando el Teorema de Green"""
         try:
@@ -1101,46 +1469,22 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
                 'y': (y_min, y_max)
             }
             
-            # Calcular el resultado
-            result = self.math_backend.solve_green_theorem(P_str, Q_str, region_limits)
-            
-            # Mostrar el resultado
-            self.result_text.delete("1.0", "end")
-            if "error" in result:
-                self.result_text.insert("1.0", f"❌ {result['error']}")
-            else:
-                display_text = (
-                    f"{result['proceso']}\n\n"
-                    f"🔢 Resultado Simbólico:\n{result['resultado_simbolico']}\n\n"
-                    f"📊 Resultado Numérico:\n{result['resultado_numerico']}"
-                )
-                self.result_text.insert("1.0", display_text)
-                
-                # Graficar la región
-                figura = self.math_backend.plot_green_region(region_limits)
-                if figura:
-                    self.show_plot_green(figura)
+            # Calcular el resultado en segundo plano; al terminar se muestra y se grafica
+            self.controlador.lanzar(
+                "solve_green_theorem", (P_str, Q_str, region_limits),
+                lambda result: self.mostrar_resultado(result, "plot_green_region", region_limits, (P_str, Q_str))
+            )
         except Exception as e:
             import traceback
             error_msg = f"❌ Error inesperado:\n{str(e)}\n\n{traceback.format_exc()}"
             self.result_text.delete("1.0", "end")
             self.result_text.insert("1.0", error_msg)
     
-    def show_plot_green(self, fig):
-        """Muestra la gráfica de la región de Green en la interfaz"""
-        # Limpiar canvas anterior si existe
-        if self.current_plot_canvas:
-            self.current_plot_canvas.get_tk_widget().destroy()
-            plt.close(self.current_plot_canvas.figure)
-            self.current_plot_canvas = None
-        
-        # Cambiar a la pestaña de gráfico automáticamente
-        self.result_tabview.set("📈 Gráfico")
-        
-        # Crear nuevo canvas en el frame de la interfaz
-        self.current_plot_canvas = FigureCanvasTkAgg(fig, master=self.plot_widget_frame)
-        self.current_plot_canvas.draw()
-        self.current_plot_canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+    def show_plot_window(self, grafico, *args):
+        """Dibuja en segundo plano la gráfica del teorema y cambia a su pestaña al terminar"""
+        self.vista_grafico.mostrar(
+            grafico, *args, al_mostrar=lambda: self.result_tabview.set("📈 Gráfico")
+        )
     
     def calculate_stokes(self):
         """Calcula usando el Teorema de Stokes"""
@@ -1174,47 +1518,17 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
                 'y': (y_min, y_max)
             }
             
-            # Calcular el resultado
-            result = self.math_backend.solve_stokes_theorem(P_str, Q_str, R_str, surface_params)
-            
-            # Mostrar el resultado
-            self.result_text.delete("1.0", "end")
-            if "error" in result:
-                self.result_text.insert("1.0", f"❌ {result['error']}")
-            else:
-                display_text = (
-                    f"{result['proceso']}\n\n"
-                    f"🔢 Resultado Simbólico:\n{result['resultado_simbolico']}\n\n"
-                    f"📊 Resultado Numérico:\n{result['resultado_numerico']}"
-                )
-                self.result_text.insert("1.0", display_text)
-                
-                # Graficar la superficie
-                figura = self.math_backend.plot_stokes_surface(surface_params)
-                if figura:
-                    self.show_plot_stokes(figura)
+            # Calcular el resultado en segundo plano; al terminar se muestra y se grafica
+            self.controlador.lanzar(
+                "solve_stokes_theorem", (P_str, Q_str, R_str, surface_params),
+                lambda result: self.mostrar_resultado(result, "plot_stokes_surface", surface_params, (P_str, Q_str, R_str))
+            )
         except Exception as e:
             import traceback
             error_msg = f"❌ Error inesperado:\n{str(e)}\n\n{traceback.format_exc()}"
             self.result_text.delete("1.0", "end")
             self.result_text.insert("1.0", error_msg)
     
-    def show_plot_stokes(self, fig):
-        """Muestra la gráfica de la superficie de Stokes en la interfaz"""
-        # Limpiar canvas anterior si existe
-        if self.current_plot_canvas:
-            self.current_plot_canvas.get_tk_widget().destroy()
-            plt.close(self.current_plot_canvas.figure)
-            self.current_plot_canvas = None
-        
-        # Cambiar a la pestaña de gráfico automáticamente
-        self.result_tabview.set("📈 Gráfico")
-        
-        # Crear nuevo canvas en el frame de la interfaz
-        self.current_plot_canvas = FigureCanvasTkAgg(fig, master=self.plot_widget_frame)
-        self.current_plot_canvas.draw()
-        self.current_plot_canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
-    
     def calculate_divergence(self):
         """Calcula usando el Teorema de Divergencia"""
         try:
@@ -1248,55 +1562,32 @@ class SurfaceIntegralFrame(ctk.CTkFrame):
                 'z': (z_min, z_max)
             }
             
-            # Calcular el resultado
-            result = self.math_backend.solve_divergence_theorem(P_str, Q_str, R_str, volume_limits)
-            
-            # Mostrar el resultado
-            self.result_text.delete("1.0", "end")
-            if "error" in result:
-                self.result_text.insert("1.0", f"❌ {result['error']}")
-            else:
-                display_text = (
-                    f"{result['proceso']}\n\n"
-                    f"🔢 Resultado Simbólico:\n{result['resultado_simbolico']}\n\n"
-                    f"📊 Resultado Numérico:\n{result['resultado_numerico']}"
-                )
-                self.result_text.insert("1.0", display_text)
-                
-                # Graficar la región
-                figura = self.math_backend.plot_divergence_region(volume_limits)
-                if figura:
-                    self.show_plot_divergence(figura)
+            # Calcular el resultado en segundo plano; al terminar se muestra y se grafica
+            self.controlador.lanzar(
+                "solve_divergence_theorem", (P_str, Q_str, R_str, volume_limits),
+                lambda result: self.mostrar_resultado(result, "plot_divergence_region", volume_limits, (P_str, Q_str, R_str))
+            )
         except Exception as e:
             import traceback
             error_msg = f"❌ Error inesperado:\n{str(e)}\n\n{traceback.format_exc()}"
             self.result_text.delete("1.0", "end")
             self.result_text.insert("1.0", error_msg)
-    
-    def show_plot_divergence(self, fig):
-        """Muestra la gráfica de la región de Divergencia en la interfaz"""
-        # Limpiar canvas anterior si existe
-        if self.current_plot_canvas:
-            self.current_plot_canvas.get_tk_widget().destroy()
-            plt.close(self.current_plot_canvas.figure)
-            self.current_plot_canvas = None
-        
-        # Cambiar a la pestaña de gráfico automáticamente
-        self.result_tabview.set("📈 Gráfico")
-        
-        # Crear nuevo canvas en el frame de la interfaz
-        self.current_plot_canvas = FigureCanvasTkAgg(fig, master=self.plot_widget_frame)
-        self.current_plot_canvas.draw()
-        self.current_plot_canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
 
 class App(ctk.CTk):
-    def __init__(self):
+    def __init__(self, inicio=None):
+        """
+        - inicio: instante (time.perf_counter) de referencia para medir el arranque;
+          por defecto, el momento de crear la ventana.
+        """
         super().__init__()
+        self.inicio = time.perf_counter() if inicio is None else inicio
+        self.tiempos_arranque = {}
+        self.al_completar_arranque = None  # recibe tiempos_arranque cuando la ventana y el backend están listos
         self.title("Calculadora de Cálculo Multivariado")
         self.geometry("1200x850")
         ctk.set_appearance_mode("light")
         self.configure(fg_color="#F8F9FA")
-        self.math_backend = MathBackend()
+        self.math_backend = BackendDiferido(timeout=TIEMPO_LIMITE_CALCULO, cache_resultados=True)
 
         # Header superior mejorado con diseño moderno
         header_container = ctk.CTkFrame(self, fg_color="transparent")
@@ -1313,12 +1604,12 @@ class App(ctk.CTk):
         )
         main_title.pack(anchor="w")
         
-        subtitle = ctk.CTkLabel(
-            title_frame, text="Integrales Triples y de Superficie",
+        self.subtitle = ctk.CTkLabel(
+            title_frame, text="Integrales Triples y de Superficie · ⏳ cargando motor de cálculo...",
             text_color="#5A6C7D",
             font=ctk.CTkFont(size=11)
         )
-        subtitle.pack(anchor="w", pady=(2, 0))
+        self.subtitle.pack(anchor="w", pady=(2, 0))
         
         # Botones de navegación mejorados
         nav_frame = ctk.CTkFrame(header_container, fg_color="#E8F5E9", corner_radius=10)
@@ -1358,6 +1649,31 @@ class App(ctk.CTk):
         self.punto2_frame = SurfaceIntegralFrame(self.container, self.math_backend)
         self.show_punto1_frame()
 
+        # Medición del arranque: ventana creada, ventana visible y backend cargado
+        self._registrar_hito("ventana_creada_ms")
+        self.bind("<Map>", self._al_mostrarse, add="+")
+        self.after(50, self._esperar_backend)
+
+    def _registrar_hito(self, hito):
+        """Guarda los milisegundos transcurridos desde `inicio` hasta un hito del arranque."""
+        if hito in self.tiempos_arranque:
+            return
+        self.tiempos_arranque[hito] = round((time.perf_counter() - self.inicio) * 1000, 1)
+        completo = {"ventana_visible_ms", "backend_listo_ms"} <= self.tiempos_arranque.keys()
+        if completo and self.al_completar_arranque is not None:
+            self.al_completar_arranque(dict(self.tiempos_arranque))
+
+    def _al_mostrarse(self, event):
+        if event.widget is self:
+            self._registrar_hito("ventana_visible_ms")
+
+    def _esperar_backend(self):
+        if not self.math_backend.listo():
+            self.after(50, self._esperar_backend)
+            return
+        self.subtitle.configure(text="Integrales Triples y de Superficie")
+        self._registrar_hito("backend_listo_ms")
+
     def show_frame(self, frame_to_show):
         self.punto1_frame.pack_forget()
         self.punto2_frame.pack_forget()
@@ -0,0 +1,150 @@
+# lote.py
+#
+# Resolución por lotes sin interfaz gráfica: lee problemas en JSON Lines (uno por
+# línea) y escribe un resultado JSON por línea en cuanto cada problema termina.
+#
+#   python lote.py problemas.jsonl -o resultados.jsonl -j 4 --timeout 30 --png graficos/
+#   cat problemas.jsonl | python lote.py
+#
+# Formato de cada problema ("tipo" es "triple" si se omite):
+#   {"id": "p1", "tipo": "triple", "func": "x*y", "mode": "Rectangulares",
+#    "limits": {"x": ["0", "1"], "y": ["0", "x"], "z": ["0", "1"]}, "metodo": "simbolico",
+#    "grafico": "dominio"}     # o "densidad" para la nube de puntos del integrando
+#   {"tipo": "green", "P": "-y", "Q": "x", "limits": {"x": [...], "y": [...]}}
+#   {"tipo": "stokes", "P": "z", "Q": "x", "R": "y", "limits": {"z": "x**2+y**2", "x": [...], "y": [...]}}
+#   {"tipo": "divergencia", "P": "x", "Q": "y", "R": "z", "limits": {"x": [...], "y": [...], "z": [...]}}
+
+import argparse
+import json
+import os
+import re
+import sys
+
+from calculo import MathBackend
+
+
+def resolver_problema(backend, problema):
+    """
+    Resuelve un problema y devuelve (resultado, gráfico), donde gráfico es
+    (método plot_*, argumentos) para MathBackend.renderizar.
+    """
+    tipo = problema.get("tipo", "triple")
+    limits = problema["limits"]
+    if tipo == "triple":
+        mode = problema["mode"]
+        resultado = backend.solve_triple_integral(
+            problema["func"], limits, mode, problema.get("metodo", "simbolico")
+        )
+        if problema.get("grafico") == "densidad":
+            return resultado, ("plot_integrand_density", (problema["func"], limits, mode))
+        graficos = {
+            "Rectangulares": "plot_rectangular_domain",
+            "Cilíndricas": "plot_cylindrical_domain",
+            "Esféricas": "plot_spherical_domain"
+        }
+        if mode not in graficos:
+            # El backend ya devolvió su propio error ("Modo no soportado")
+            return resultado, None
+        return resultado, (graficos[mode], (limits,))
+    if tipo == "green":
+        resultado = backend.solve_green_theorem(problema["P"], problema["Q"], limits)
+        return resultado, ("plot_green_region", (limits, (problema["P"], problema["Q"])))
+    if tipo == "stokes":
+        campo = (problema["P"], problema["Q"], problema["R"])
+        resultado = backend.solve_stokes_theorem(*campo, limits)
+        return resultado, ("plot_stokes_surface", (limits, campo))
+    if tipo == "divergencia":
+        campo = (problema["P"], problema["Q"], problema["R"])
+        resultado = backend.solve_divergence_theorem(*campo, limits)
+        return resultado, ("plot_divergence_region", (limits, campo))
+    return {"error": f"Tipo de problema no soportado: {tipo}"}, None
+
+
+def _ruta_png(directorio_png, problema, numero):
+    """
+    Ruta del PNG de un problema dentro de `directorio_png`. El nombre sale del
+    "id" reducido a letras, dígitos, '.', '_' y '-' (sin directorios), o del
+    número de línea si no queda nada; nunca sale del directorio.
+    """
+    nombre = re.sub(r"[^A-Za-z0-9._-]", "_", os.path.basename(str(problema.get("id", "")))).lstrip(".")
+    directorio = os.path.realpath(directorio_png)
+    ruta = os.path.realpath(os.path.join(directorio, f"{nombre or numero}.png"))
+    if os.path.dirname(ruta) != directorio:
+        return os.path.join(directorio_png, f"{numero}.png")
+    return os.path.join(directorio_png, os.path.basename(ruta))
+
+
+def _procesar_problema(backend, trabajo):
+    """
+    Se ejecuta en un proceso del pool: interpreta la línea, resuelve el problema
+    y, si se pidió, guarda la gráfica del dominio como PNG.
+    """
+    numero, linea, directorio_png = trabajo
+    try:
+        problema = json.loads(linea)
+        if not isinstance(problema, dict):
+            return {"error": f"Problema mal formado: se esperaba un objeto JSON, no {type(problema).__name__}"}
+        resultado, grafico = resolver_problema(backend, problema)
+    except (ValueError, KeyError, TypeError) as e:
+        return {"error": f"Problema mal formado: {e}"}
+
+    salida = {"id": problema.get("id"), **resultado}
+    if directorio_png and grafico is not None and "error" not in resultado:
+        nombre_grafico, argumentos = grafico
+        png = backend.renderizar(nombre_grafico, *argumentos)
+        if png is not None:
+            ruta = _ruta_png(directorio_png, problema, numero)
+            with open(ruta, "wb") as archivo:
+                archivo.write(png)
+            salida["png"] = ruta
+    return salida
+
+
+def _leer_trabajos(entrada, directorio_png):
+    """Un trabajo por línea no vacía; su número es el índice del problema en la salida."""
+    lineas = (linea for linea in entrada if linea.strip())
+    for numero, linea in enumerate(lineas):
+        yield numero, linea, directorio_png
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Resuelve integrales en lote: problemas JSON Lines de entrada, resultados JSON Lines de salida."
+    )
+    parser.add_argument("entrada", nargs="?", default="-",
+                        help="archivo .jsonl con los problemas (por defecto, stdin)")
+    parser.add_argument("-o", "--salida", default="-",
+                        help="archivo .jsonl de resultados (por defecto, stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="límite de tiempo en segundos por problema")
+    parser.add_argument("--png", metavar="DIRECTORIO", default=None,
+                        help="guarda la gráfica del dominio de cada problema en DIRECTORIO")
+    parser.add_argument("--cache", action="store_true",
+                        help="usa la caché persistente de resultados")
+    parser.add_argument("--nativo", action="store_true",
+                        help="compila a C los integrandos que se aproximan por cubatura")
+    args = parser.parse_args(argv)
+
+    if args.png:
+        os.makedirs(args.png, exist_ok=True)
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    salida = sys.stdout if args.salida == "-" else open(args.salida, "w", encoding="utf-8")
+    backend = MathBackend(timeout=args.timeout, cache_resultados=args.cache, nativo=args.nativo)
+    try:
+        trabajos = _leer_trabajos(entrada, args.png)
+        for numero, resultado in backend.resolver_en_pool(_procesar_problema, trabajos, args.workers):
+            salida.write(json.dumps({"indice": numero, **resultado}, ensure_ascii=False) + "\n")
+            salida.flush()
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
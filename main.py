@@ -1,7 +1,20 @@
 # main.py
 
+import json
+import sys
+import time
+
+# Referencia para medir el tiempo de arranque
+INICIO = time.perf_counter()
+
 from interfaz import App
 
 if __name__ == "__main__":
-    app = App()
+    app = App(inicio=INICIO)
+    if "--reporte-arranque" in sys.argv[1:]:
+        # Imprime en JSON los milisegundos hasta cada hito del arranque y cierra la aplicación
+        def reportar(tiempos):
+            print(json.dumps(tiempos))
+            app.destroy()
+        app.al_completar_arranque = reportar
     app.mainloop()
@@ -0,0 +1,222 @@
+# mallas.py
+
+import numpy as np
+
+# Puntos mínimos por eje de una malla adaptativa
+PUNTOS_MINIMOS = 4
+
+
+def _curvatura_por_nodo(Z, eje):
+    """
+    Indicador de curvatura en cada nodo del eje `eje` de la malla piloto:
+    la raíz del mayor |Δ²z| a lo largo de ese eje (el máximo se toma sobre el
+    otro eje). Los valores no finitos no cuentan.
+    """
+    d2 = np.abs(np.diff(Z, n=2, axis=eje))
+    d2 = np.where(np.isfinite(d2), d2, 0.0).max(axis=1 - eje)
+    # Para interpolación lineal a trozos la densidad óptima de nodos es ∝ |f''|^(1/2)
+    curvatura = np.sqrt(d2)
+    # Δ² se define en los nodos interiores: los extremos copian a su vecino
+    return np.concatenate(([curvatura[0]], curvatura, [curvatura[-1]]))
+
+
+def _equidistribuir(t, curvatura, n):
+    """
+    Elige n nodos en t (de t[0] a t[-1]) con igual integral de la densidad
+    `1·media + curvatura` entre nodos consecutivos. La parte constante reparte
+    la mitad de los puntos de forma uniforme, de modo que las zonas planas no
+    se quedan vacías.
+    """
+    media = curvatura.mean()
+    densidad = curvatura + (media if media > 0 else 1.0)
+    acumulada = np.concatenate(([0.0], np.cumsum((densidad[:-1] + densidad[1:]) / 2 * np.diff(t))))
+    return np.interp(np.linspace(0.0, acumulada[-1], n), acumulada, t)
+
+
+def malla_adaptativa(funciones, intervalo_u, intervalo_v, presupuesto, muestreo=None):
+    """
+    Nodos (us, vs) de una malla producto no uniforme, con más nodos donde las
+    superficies z = f(u, v) se curvan más, y como mucho `presupuesto` vértices
+    (len(us) * len(vs)).
+
+    Parámetros:
+    - funciones: funciones vectorizadas f(U, V) (por ejemplo, de lambdify); si
+      hay varias se refina donde cualquiera de ellas lo necesite
+    - intervalo_u, intervalo_v: (inicio, fin) de cada eje
+    - presupuesto: número máximo de vértices de la malla
+    - muestreo: puntos por eje de la malla piloto uniforme sobre la que se mide
+      la curvatura (por defecto, el doble de los de una malla uniforme)
+
+    Los ejes se usan como en np.meshgrid(us, vs): U y V tienen forma (len(vs), len(us)).
+    """
+    presupuesto = max(int(presupuesto), PUNTOS_MINIMOS ** 2)
+    if muestreo is None:
+        muestreo = max(2 * int(np.sqrt(presupuesto)), 16)
+    u = np.linspace(intervalo_u[0], intervalo_u[1], muestreo)
+    v = np.linspace(intervalo_v[0], intervalo_v[1], muestreo)
+    U, V = np.meshgrid(u, v)
+
+    curvatura_u = np.zeros(muestreo)
+    curvatura_v = np.zeros(muestreo)
+    for funcion in funciones:
+        Z = np.broadcast_to(np.asarray(funcion(U, V), dtype=float), U.shape)
+        curvatura_u = np.maximum(curvatura_u, _curvatura_por_nodo(Z, 1))
+        curvatura_v = np.maximum(curvatura_v, _curvatura_por_nodo(Z, 0))
+
+    # Más nodos en el eje a lo largo del cual la superficie cambia más (razón acotada a 1:5)
+    cu, cv = curvatura_u.mean(), curvatura_v.mean()
+    suelo = (cu + cv) / 4 + 1e-300
+    razon = (cu + suelo) / (cv + suelo)
+    n_u = int(np.clip(round(np.sqrt(presupuesto * razon)), PUNTOS_MINIMOS, presupuesto // PUNTOS_MINIMOS))
+    n_v = max(presupuesto // n_u, PUNTOS_MINIMOS)
+
+    return _equidistribuir(u, curvatura_u, n_u), _equidistribuir(v, curvatura_v, n_v)
+
+
+def _area(X, Y, Z):
+    """Área aproximada de una superficie dada por una malla (suma de paralelogramos)."""
+    P = np.stack([X, Y, Z], axis=-1)
+    du = P[:-1, 1:] - P[:-1, :-1]
+    dv = P[1:, :-1] - P[:-1, :-1]
+    return float(np.nansum(np.linalg.norm(np.cross(du, dv), axis=-1)))
+
+
+def caras_de_region(limites, a_cartesianas, n, periodica=False):
+    """
+    Superficies que encierran la región de una integral iterada
+
+        a0 ≤ a ≤ a1,   b0(a) ≤ b ≤ b1(a),   c0(b, a) ≤ c ≤ c1(b, a)
+
+    como lista de (cara, X, Y, Z), con cara en "c_inf", "c_sup", "b_inf",
+    "b_sup", "a_inf" y "a_sup".
+
+    Parámetros:
+    - limites: [(c0, c1), (b0, b1), (a0, a1)], del más interno al más externo
+      como en sp.integrate. c0/c1 son funciones vectorizadas de (b, a), b0/b1
+      de (a,) y a0/a1 números.
+    - a_cartesianas: función (c, b, a) -> (X, Y, Z)
+    - n: puntos por eje de cada cara
+    - periodica: la variable externa es un ángulo; si da la vuelta completa, las
+      caras a = a0 y a = a1 coinciden y no se dibujan
+
+    Todas las caras salen de la misma malla unitaria (u, w) ∈ [0, 1]²: cada
+    variable se interpola entre sus límites evaluados con broadcasting, y los
+    límites de b se evalúan una sola vez para las caras que comparten a. Los
+    puntos donde un límite no está definido o el superior queda por debajo del
+    inferior se enmascaran (NaN), y las caras degeneradas (de área nula, como
+    ρ = 0 o el eje φ = 0) se omiten.
+    """
+    (c0, c1), (b0, b1), (a0, a1) = limites
+    t = np.linspace(0.0, 1.0, n)
+    U, W = np.meshgrid(t, t)
+
+    def interpolar(inferior, superior, fraccion):
+        return inferior + fraccion * (superior - inferior)
+
+    def cara(nombre, b, a, b_inf, b_sup, fraccion_c):
+        # c = c0 + fraccion_c·(c1 - c0) en los puntos (b, a): 0 o 1 en las tapas
+        c_inf, c_sup = c0(b, a), c1(b, a)
+        X, Y, Z = np.broadcast_arrays(*a_cartesianas(interpolar(c_inf, c_sup, fraccion_c), b, a))
+        validos = np.broadcast_to((b_sup >= b_inf) & (c_sup >= c_inf), X.shape)
+        return (nombre, *(np.where(validos, coordenada, np.nan) for coordenada in (X, Y, Z)))
+
+    caras = []
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # c = c0 y c = c1 sobre la malla (a, b)
+        A = interpolar(a0, a1, U)
+        b_inf, b_sup = b0(A), b1(A)
+        B = interpolar(b_inf, b_sup, W)
+        caras.append(cara("c_inf", B, A, b_inf, b_sup, 0.0))
+        caras.append(cara("c_sup", B, A, b_inf, b_sup, 1.0))
+
+        # b = b0(a) y b = b1(a) sobre la malla (a, c)
+        caras.append(cara("b_inf", b_inf, A, b_inf, b_sup, W))
+        caras.append(cara("b_sup", b_sup, A, b_inf, b_sup, W))
+
+        # a = a0 y a = a1 sobre la malla (b, c)
+        if not (periodica and np.isclose(abs(a1 - a0), 2 * np.pi)):
+            for nombre, a in (("a_inf", a0), ("a_sup", a1)):
+                b_inf_a, b_sup_a = b0(a), b1(a)
+                caras.append(cara(nombre, interpolar(b_inf_a, b_sup_a, U), a, b_inf_a, b_sup_a, W))
+
+    areas = [_area(X, Y, Z) for _, X, Y, Z in caras]
+    umbral = 1e-9 * max(areas, default=0.0)
+    return [cara for cara, area in zip(caras, areas) if area > umbral]
+
+
+def centros_de_celdas(intervalos, presupuesto):
+    """
+    Centros de las celdas de una malla regular sobre la caja `intervalos`
+    ([(inicio, fin), ...], uno por eje), con a lo sumo `presupuesto` puntos y
+    casi el mismo espaciado en todos los ejes: en una caja alargada el eje largo
+    recibe más puntos, de modo que la densidad es uniforme en el espacio.
+
+    Devuelve (nodos de cada eje, menor espaciado entre nodos).
+    """
+    extensiones = np.array([abs(fin - inicio) for inicio, fin in intervalos], dtype=float)
+    extensiones = np.maximum(extensiones, 1e-12 * max(extensiones.max(), 1.0))
+    paso = (np.prod(extensiones) / presupuesto) ** (1 / len(extensiones))
+    puntos = np.maximum(np.floor(extensiones / paso).astype(int), 1)
+    while np.prod(puntos) > presupuesto:
+        puntos[np.argmax(puntos)] -= 1
+
+    nodos = [inicio + (np.arange(n) + 0.5) * (fin - inicio) / n for (inicio, fin), n in zip(intervalos, puntos)]
+    return nodos, float(np.min(extensiones / puntos))
+
+
+def muestrear_densidad(densidad, limites, n, presupuesto, bloque=8, semilla=0):
+    """
+    Muestra de hasta `presupuesto` vóxeles de una rejilla n³ en float32 sobre
+    la región de `limites` (mismo formato que en caras_de_region), elegidos con
+    probabilidad proporcional a |densidad(c, b, a, out=...)|; `densidad` escribe
+    cada bloque en el mismo búfer float32 (como los núcleos de nucleos.compilar).
+
+    La rejilla cubre la caja que encierra la región en las coordenadas (c, b, a)
+    y se recorre por bloques de `bloque` planos a = cte: cada bloque se recorta
+    a la región, se evalúa de una vez y se mezcla con la muestra acumulada
+    (claves de Efraimidis-Spirakis, log(u)/w, conservando las mayores). Así la
+    memoria depende de bloque·n² y de `presupuesto`, no de n³.
+
+    Devuelve (c, b, a, valores) de los vóxeles elegidos, en float32.
+    """
+    (c0, c1), (b0, b1), (a0, a1) = limites
+
+    def centros(inicio, fin):
+        return (inicio + (np.arange(n, dtype=np.float32) + 0.5) * (fin - inicio) / n).astype(np.float32)
+
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        # Caja de la región: b entre sus límites para cada a, y c en esos (b, a)
+        a = centros(a0, a1)
+        b_inf = np.broadcast_to(b0(a), a.shape)
+        b_sup = np.broadcast_to(b1(a), a.shape)
+        fraccion = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+        B_borde = b_inf + fraccion * (b_sup - b_inf)
+        b = centros(np.nanmin(b_inf), np.nanmax(b_sup))
+        c = centros(np.nanmin(c0(B_borde, a)), np.nanmax(c1(B_borde, a)))
+
+        rng = np.random.default_rng(semilla)
+        claves = np.empty(0)
+        indices = np.empty((0, 3), dtype=np.int32)
+        valores = np.empty(0, dtype=np.float32)
+        B = b[None, :, None]
+        C = c[None, None, :]
+        buffer = np.empty((bloque, n, n), dtype=np.float32)
+        for inicio in range(0, n, bloque):
+            A = a[inicio:inicio + bloque, None, None]
+            forma = (A.shape[0], n, n)
+            dentro = (B >= b0(A)) & (B <= b1(A)) & (C >= c0(B, A)) & (C <= c1(B, A))
+            valores_bloque = densidad(C, B, A, out=buffer[:A.shape[0]])
+            dentro = np.broadcast_to(dentro, forma) & np.isfinite(valores_bloque) & (valores_bloque != 0)
+            i, j, k = np.nonzero(dentro)
+            if i.size == 0:
+                continue
+
+            nuevos_valores = valores_bloque[i, j, k]
+            claves = np.concatenate([claves, np.log(rng.random(i.size)) / np.abs(nuevos_valores)])
+            indices = np.concatenate([indices, np.column_stack([i + inicio, j, k]).astype(np.int32)])
+            valores = np.concatenate([valores, nuevos_valores])
+            if claves.size > presupuesto:
+                elegidos = np.argpartition(claves, -presupuesto)[-presupuesto:]
+                claves, indices, valores = claves[elegidos], indices[elegidos], valores[elegidos]
+
+    return c[indices[:, 2]], b[indices[:, 1]], a[indices[:, 0]], valores
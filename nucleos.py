@@ -0,0 +1,317 @@
+# nucleos.py
+
+import ctypes
+import hashlib
+import importlib
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+
+import numpy as np
+import sympy as sp
+from sympy.printing.numpy import NumPyPrinter
+
+from cache import DIRECTORIO_CACHE
+
+# Bibliotecas compiladas de los núcleos nativos (se pueden borrar en cualquier momento)
+DIRECTORIO_NUCLEOS = os.path.join(DIRECTORIO_CACHE, "nucleos")
+
+# Formas de compilar un núcleo, de la más rápida a la más portable: (simd,
+# opciones, bibliotecas). Con simd, el bucle interno se vectoriza y llama a las
+# funciones vectoriales de glibc (libmvec); si no se puede compilar o cargar,
+# se pasa a la siguiente. -fno-math-errno permite que sqrt sea una instrucción
+# y no cambia los resultados (ni los NaN).
+VARIANTES_COMPILACION = [
+    (True, ["-O3", "-march=native", "-fno-math-errno", "-fopenmp-simd", "-shared", "-fPIC"], ["-lmvec", "-lm"]),
+    (False, ["-O2", "-fno-math-errno", "-shared", "-fPIC"], ["-lm"]),
+]
+
+# Funciones de math.h con versión vectorial en libmvec (glibc ≥ 2.35 para casi todas)
+FUNCIONES_SIMD = {
+    1: ["sin", "cos", "tan", "asin", "acos", "atan", "sinh", "cosh", "tanh", "asinh", "acosh", "atanh",
+        "exp", "exp2", "expm1", "log", "log2", "log10", "log1p", "cbrt", "erf", "erfc"],
+    2: ["pow", "atan2", "hypot"],
+}
+
+_bibliotecas = {}
+_lock_bibliotecas = threading.Lock()
+
+
+def _ultimo_uso(reemplazos, reducida):
+    """Para cada temporal de sp.cse, índice de la última asignación que lo usa (None si lo usa el resultado)."""
+    ultimo = {}
+    for indice, (_, subexpresion) in enumerate(reemplazos):
+        for simbolo in subexpresion.free_symbols:
+            ultimo[simbolo] = indice
+    for simbolo in reducida.free_symbols:
+        ultimo[simbolo] = None
+    return ultimo
+
+
+def compilar(variables, expr):
+    """
+    Compila `expr` en una función NumPy f(*variables, out=None) equivalente a
+    sp.lambdify(variables, expr, 'numpy'), pero con eliminación de
+    subexpresiones comunes: cada subexpresión repetida (sin(phi), cos(theta),
+    r**2...) se calcula una sola vez por llamada y su array se suelta en cuanto
+    deja de usarse.
+
+    Si se pasa `out` (un array con la forma del resultado), el resultado se
+    escribe en él y se devuelve `out`, de modo que un bucle por bloques puede
+    reutilizar siempre el mismo búfer. El código generado queda en f.codigo.
+    """
+    variables = tuple(variables)
+    argumentos = [sp.Symbol(f"_v{i}") for i in range(len(variables))]
+    expr = sp.sympify(expr).xreplace(dict(zip(variables, argumentos)))
+    reemplazos, (reducida,) = sp.cse(expr, symbols=sp.numbered_symbols("_t"))
+
+    impresora = NumPyPrinter({"fully_qualified_modules": False, "inline": True,
+                              "allow_unknown_functions": True, "user_functions": {}})
+    imprimir = impresora.doprint
+    ultimo = _ultimo_uso(reemplazos, reducida)
+    lineas = [f"def nucleo({', '.join(map(str, argumentos))}{', ' if argumentos else ''}out=None):"]
+    for indice, (simbolo, subexpresion) in enumerate(reemplazos):
+        lineas.append(f"    {simbolo} = {imprimir(subexpresion)}")
+        muertos = [str(s) for s, i in ultimo.items() if i == indice and str(s).startswith("_t")]
+        if muertos:
+            lineas.append(f"    del {', '.join(sorted(muertos))}")
+    lineas += [
+        f"    resultado = {imprimir(reducida)}",
+        "    if out is None:",
+        "        return resultado",
+        "    numpy.copyto(out, resultado, casting='unsafe')",
+        "    return out",
+    ]
+    codigo = "\n".join(lineas)
+
+    espacio = {"numpy": np, **{nombre: getattr(np, nombre) for nombre in dir(np) if not nombre.startswith("_")}}
+    # Lo que la impresora usa fuera de NumPy (p. ej. functools.reduce para Max y
+    # Min), como hace lambdify con module_imports
+    for modulo, nombres in impresora.module_imports.items():
+        for nombre in nombres:
+            espacio[nombre] = getattr(importlib.import_module(modulo), nombre)
+    exec(compile(codigo, f"<nucleo {expr}>", "exec"), espacio)
+    nucleo = espacio["nucleo"]
+    nucleo.codigo = codigo
+    return nucleo
+
+
+def _compilador():
+    """Compilador de C del sistema (variable CC, cc o gcc), o None si no hay ninguno."""
+    return os.environ.get("CC") or shutil.which("cc") or shutil.which("gcc")
+
+
+def _codigo_c(reemplazos, reducida, profundidades, ejes, simd=False, contiguos=()):
+    """
+    Función C que evalúa la expresión (ya pasada por sp.cse, en _v0, _v1, ...)
+    sobre una malla de `ejes` dimensiones con un bucle anidado por eje. Cada
+    argumento j llega como puntero y pasos por eje (en elementos, 0 en los ejes
+    de broadcasting) y no varía después del eje profundidades[j] - 1, así que se
+    lee en ese nivel del bucle. Cada subexpresión se calcula en el nivel más
+    externo en que ya están definidos sus operandos: sin(phi) no se repite para
+    cada rho. Con `simd`, el bucle más interno se vectoriza; los argumentos de
+    `contiguos` tienen paso 1 en su último eje, de modo que su lectura en ese
+    bucle es un acceso consecutivo.
+    """
+    nivel = {sp.Symbol(f"_v{j}"): p for j, p in enumerate(profundidades)}
+    por_nivel = [[] for _ in range(ejes + 1)]
+    elevados = sp.numbered_symbols("_h")
+
+    def nivel_de(expr):
+        return max((nivel[s] for s in expr.free_symbols), default=0)
+
+    def definir(simbolo, expr):
+        nivel[simbolo] = nivel_de(expr)
+        por_nivel[nivel[simbolo]].append(f"const double {simbolo} = {sp.ccode(expr, strict=True)};")
+
+    def elevar(expr):
+        """
+        Saca a un temporal de su nivel las partes de `expr` que no dependen del
+        eje más interno que usa: los factores (o sumandos) de nivel menor de
+        r**2*sin(phi)**2*sin(theta) se multiplican fuera del bucle de theta.
+        """
+        if expr.is_Atom:
+            return expr
+        expr = expr.func(*(elevar(a) for a in expr.args))
+        alto = nivel_de(expr)
+        # Solo se elevan expresiones numéricas (no condiciones de un Piecewise)
+        bajos = [a for a in expr.args if isinstance(a, sp.Expr) and nivel_de(a) < alto]
+        if not bajos or (len(bajos) == 1 and bajos[0].is_Atom):
+            return expr
+        if expr.is_Mul or expr.is_Add:
+            temporal = next(elevados)
+            definir(temporal, expr.func(*bajos))
+            return expr.func(temporal, *(a for a in expr.args if nivel_de(a) == alto))
+        argumentos = []
+        for a in expr.args:
+            if isinstance(a, sp.Expr) and nivel_de(a) < alto and not a.is_Atom:
+                temporal = next(elevados)
+                definir(temporal, a)
+                a = temporal
+            argumentos.append(a)
+        return expr.func(*argumentos)
+
+    for j, p in enumerate(profundidades):
+        # Desplazamiento acumulado por nivel: o{j}_{k+1} = o{j}_{k} + i{k}·paso
+        for eje in range(p - 1):
+            anterior = f"o{j}_{eje}" if eje else "0"
+            por_nivel[eje + 1].append(f"const long o{j}_{eje + 1} = {anterior} + i{eje} * e{j}[{eje}];")
+        if p == 0:
+            indice = "0"
+        else:
+            base = f"o{j}_{p - 1} + " if p > 1 else ""
+            indice = base + (f"i{p - 1}" if j in contiguos else f"i{p - 1} * e{j}[{p - 1}]")
+        por_nivel[p].append(f"const double _v{j} = a{j}[{indice}];")
+    for simbolo, subexpresion in reemplazos:
+        definir(simbolo, elevar(subexpresion))
+    reducida = elevar(reducida)
+
+    cuerpo = []
+    sangria = "    "
+    for eje in range(ejes + 1):
+        cuerpo += [sangria + linea for linea in por_nivel[eje]]
+        if eje < ejes:
+            if simd and eje == ejes - 1:
+                cuerpo.append(f"{sangria}#pragma omp simd")
+            cuerpo.append(f"{sangria}for (long i{eje} = 0; i{eje} < forma[{eje}]; i{eje}++) {{")
+            sangria += "    "
+            cuerpo.append(f"{sangria}const long f{eje + 1} = f{eje} * forma[{eje}] + i{eje};")
+    cuerpo.append(f"{sangria}out[f{ejes}] = {sp.ccode(reducida, strict=True)};")
+    for eje in reversed(range(ejes)):
+        sangria = sangria[:-4]
+        cuerpo.append(sangria + "}")
+
+    lineas = ["#define _USE_MATH_DEFINES", "#include <math.h>", ""]
+    if simd:
+        texto = "\n".join(cuerpo)
+        for aridad, nombres in FUNCIONES_SIMD.items():
+            for nombre in nombres:
+                if f"{nombre}(" in texto:
+                    parametros = ", ".join(["double"] * aridad)
+                    lineas += ["#pragma omp declare simd notinbranch", f"double {nombre}({parametros});"]
+        lineas.append("")
+    parametros = "".join(f"const double *a{j}, const long *e{j}, " for j in range(len(profundidades)))
+    lineas += [f"void nucleo({parametros}const long *forma, double *out)", "{", "    const long f0 = 0;"]
+    lineas += cuerpo
+    lineas += ["}", ""]
+    return "\n".join(lineas)
+
+
+def _profundidad(pasos):
+    """Número de ejes iniciales hasta el último en que varía un array (paso distinto de 0)."""
+    return max((eje + 1 for eje, paso in enumerate(pasos) if paso != 0), default=0)
+
+
+def _biblioteca(codigo, compilador, opciones, bibliotecas):
+    """
+    Carga la biblioteca compartida de `codigo`, compilándola solo si no está ya
+    en DIRECTORIO_NUCLEOS. El nombre es el hash del código, del compilador, de
+    las opciones y de la máquina (-march=native no sirve en otra CPU).
+    """
+    partes = [codigo, compilador, *opciones, *bibliotecas, platform.node(), platform.machine()]
+    huella = hashlib.sha256("\0".join(partes).encode("utf-8")).hexdigest()[:24]
+    with _lock_bibliotecas:
+        if huella in _bibliotecas:
+            return _bibliotecas[huella]
+        ruta = os.path.join(DIRECTORIO_NUCLEOS, f"nucleo_{huella}.so")
+        if not os.path.exists(ruta):
+            os.makedirs(DIRECTORIO_NUCLEOS, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=DIRECTORIO_NUCLEOS) as temporal:
+                fuente = os.path.join(temporal, "nucleo.c")
+                with open(fuente, "w", encoding="utf-8") as archivo:
+                    archivo.write(codigo)
+                salida = os.path.join(temporal, "nucleo.so")
+                subprocess.run([compilador, *opciones, fuente, "-o", salida, *bibliotecas],
+                               check=True, capture_output=True, timeout=60)
+                # Otro proceso pudo compilar el mismo núcleo a la vez: os.replace es atómico
+                os.replace(salida, ruta)
+        biblioteca = _bibliotecas[huella] = ctypes.CDLL(ruta)
+        return biblioteca
+
+
+def compilar_c(variables, expr):
+    """
+    Versión nativa de compilar(): genera C con sp.ccode (tras sp.cse), lo
+    compila con el compilador del sistema y lo carga con ctypes. La función
+    resultante tiene la misma firma f(*variables, out=None) y admite el mismo
+    broadcasting: los argumentos se pasan a C sin expandir, como vistas con paso
+    0 en los ejes en que no varían (como las coordenadas de la cubatura o de
+    una malla con sparse=True), y se leen en el nivel del bucle que les
+    corresponde.
+
+    Se compila una versión por cada combinación de ejes de los argumentos, y las
+    bibliotecas se guardan en disco por hash, así que cada integrando se compila
+    una sola vez. Si no hay compilador, la expresión tiene funciones sin
+    equivalente en C o ninguna variante compila, se usa el núcleo NumPy de
+    compilar(). f.nativo es False si se sabe de antemano que será así.
+    """
+    variables = tuple(variables)
+    compilador = _compilador()
+    try:
+        if compilador is None:
+            raise RuntimeError("no hay compilador de C")
+        argumentos = [sp.Symbol(f"_v{i}") for i in range(len(variables))]
+        reemplazos, (reducida,) = sp.cse(sp.sympify(expr).xreplace(dict(zip(variables, argumentos))),
+                                         symbols=sp.numbered_symbols("_t"))
+        # Si la expresión no se puede pasar a C se sabe aquí y no en la primera llamada
+        _codigo_c(reemplazos, reducida, (0,) * len(variables), 0)
+    except Exception:
+        nucleo = compilar(variables, expr)
+        nucleo.nativo = False
+        return nucleo
+
+    puntero = ctypes.POINTER(ctypes.c_double)
+    pasos = ctypes.POINTER(ctypes.c_long)
+    versiones = {}
+    respaldo = []
+
+    def version(profundidades, ejes, contiguos):
+        """Función C para esta combinación de ejes, o None si ninguna variante compila."""
+        clave = (profundidades, ejes, contiguos)
+        if clave not in versiones:
+            versiones[clave] = None
+            for simd, opciones, bibliotecas in VARIANTES_COMPILACION:
+                try:
+                    codigo = _codigo_c(reemplazos, reducida, profundidades, ejes, simd, contiguos)
+                    funcion_c = _biblioteca(codigo, compilador, opciones, bibliotecas).nucleo
+                except (OSError, subprocess.SubprocessError):
+                    continue
+                funcion_c.argtypes = [puntero, pasos] * len(variables) + [pasos, puntero]
+                funcion_c.restype = None
+                versiones[clave] = funcion_c
+                break
+        return versiones[clave]
+
+    def nucleo(*valores, out=None):
+        valores = [np.asarray(v, dtype=float) for v in valores]
+        forma = np.broadcast_shapes(*(v.shape for v in valores))
+        vistas = [np.broadcast_to(v, forma) for v in valores]
+        pasos_por_eje = [[paso // v.itemsize for paso in v.strides] for v in vistas]
+        profundidades = tuple(_profundidad(p) for p in pasos_por_eje)
+        contiguos = tuple(j for j, (p, pasos_j) in enumerate(zip(profundidades, pasos_por_eje))
+                          if p and pasos_j[p - 1] == 1)
+        funcion_c = version(profundidades, len(forma), contiguos)
+        if funcion_c is None:
+            if not respaldo:
+                respaldo.append(compilar(variables, expr))
+            return respaldo[0](*valores, out=out)
+
+        directo = (out is not None and out.dtype == np.float64 and out.shape == forma
+                   and out.flags.c_contiguous and out.flags.writeable)
+        resultado = out if directo else np.empty(forma)
+        argumentos = []
+        for vista, p in zip(vistas, pasos_por_eje):
+            argumentos += [vista.ctypes.data_as(puntero), (ctypes.c_long * len(forma))(*p)]
+        # ctypes suelta el GIL durante la llamada
+        funcion_c(*argumentos, (ctypes.c_long * len(forma))(*forma), resultado.ctypes.data_as(puntero))
+        if out is None:
+            return resultado if forma else resultado[()]
+        if not directo:
+            np.copyto(out, resultado, casting="unsafe")
+        return out
+
+    nucleo.nativo = True
+    return nucleo
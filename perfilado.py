@@ -0,0 +1,70 @@
+# perfilado.py
+
+import json
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class Perfilador:
+    """
+    Acumula los tiempos por etapa (en milisegundos) de los cálculos de todo el
+    proceso. Para cada "método.etapa" guarda el número de mediciones, el total y
+    las últimas `max_muestras` muestras, con las que se calculan los percentiles.
+    """
+
+    def __init__(self, max_muestras=1000):
+        self.max_muestras = max_muestras
+        self._lock = threading.Lock()
+        self._conteos = {}
+        self._totales = {}
+        self._muestras = {}
+
+    def registrar(self, metodo, tiempos):
+        """Añade las mediciones {etapa: ms} de una llamada a `metodo`."""
+        with self._lock:
+            for etapa, ms in tiempos.items():
+                clave = f"{metodo}.{etapa}"
+                if clave not in self._muestras:
+                    self._muestras[clave] = deque(maxlen=self.max_muestras)
+                    self._conteos[clave] = 0
+                    self._totales[clave] = 0.0
+                self._muestras[clave].append(ms)
+                self._conteos[clave] += 1
+                self._totales[clave] += ms
+
+    def resumen(self):
+        """Conteo, total, media y percentiles (p50, p95, p99) de cada etapa, en ms."""
+        with self._lock:
+            resumen = {}
+            for clave, muestras in sorted(self._muestras.items()):
+                p50, p95, p99 = np.percentile(np.fromiter(muestras, dtype=float), [50, 95, 99])
+                resumen[clave] = {
+                    "n": self._conteos[clave],
+                    "total_ms": round(self._totales[clave], 3),
+                    "media_ms": round(self._totales[clave] / self._conteos[clave], 3),
+                    "p50_ms": round(float(p50), 3),
+                    "p95_ms": round(float(p95), 3),
+                    "p99_ms": round(float(p99), 3),
+                    "max_ms": round(max(muestras), 3)
+                }
+            return resumen
+
+    def volcar_json(self, ruta=None):
+        """Devuelve el resumen en JSON y, si se indica `ruta`, lo escribe en ese archivo."""
+        texto = json.dumps(self.resumen(), indent=2, ensure_ascii=False)
+        if ruta is not None:
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(texto)
+        return texto
+
+    def reiniciar(self):
+        with self._lock:
+            self._conteos.clear()
+            self._totales.clear()
+            self._muestras.clear()
+
+
+# Contadores de todo el proceso, compartidos por todos los MathBackend
+PERFILADOR = Perfilador()
@@ -0,0 +1,77 @@
+# polinomios.py
+
+import sympy as sp
+
+
+def _es_aplicable(integrando, dominios):
+    """
+    El integrando es un polinomio en las variables de integración y cada límite
+    es un polinomio en las variables más externas (constante en la más externa).
+    """
+    variables = [variable for variable, _, _ in dominios]
+    if not integrando.is_polynomial(*variables):
+        return False
+    for i, (_, inferior, superior) in enumerate(dominios):
+        internas, externas = set(variables[:i + 1]), variables[i + 1:]
+        for limite in (inferior, superior):
+            if limite.free_symbols & internas or not limite.is_polynomial(*externas):
+                return False
+    return True
+
+
+def _por_potencias(primitiva, restantes):
+    """Coeficientes de la primitiva F(v, ...) por potencia de v: {k: polinomio en `restantes`}."""
+    grupos = {}
+    for (k, *monomio), coeficiente in primitiva.terms():
+        grupos.setdefault(k, {})[tuple(monomio)] = coeficiente
+    return {k: sp.Poly.from_dict(terminos, *restantes, domain=primitiva.domain) for k, terminos in grupos.items()}
+
+
+def _evaluar(coeficientes, limite, restantes):
+    """Σ c_k(...)·limite^k con las potencias del límite calculadas una sola vez (tabla de potencias)."""
+    base = sp.Poly(limite, *restantes)
+    potencia = sp.Poly(1, *restantes, domain=base.domain)
+    resultado = sp.Poly(0, *restantes, domain=base.domain)
+    for k in range(max(coeficientes) + 1):
+        if k in coeficientes:
+            resultado += coeficientes[k] * potencia
+        potencia *= base
+    return resultado
+
+
+def integrar_polinomio(integrando, dominios):
+    """
+    Integral exacta de un integrando polinómico sobre `dominios` (en el orden
+    de sp.integrate) con límites constantes o polinómicos en las variables más
+    externas: cajas y regiones de tipo I, II y III como 0 ≤ z ≤ 1 - x - y.
+
+    Se trabaja con sp.Poly de principio a fin: la variable más interna se
+    integra monomio a monomio (v^k -> v^(k+1)/(k+1)) y la primitiva se evalúa
+    en los límites agrupando sus términos por potencia de v, sin pasar por
+    expresiones ni por el integrador general de SymPy.
+
+    Devuelve (integral, nota para el proceso), o None si no es aplicable.
+    """
+    integrando = sp.sympify(integrando)
+    dominios = [(variable, sp.sympify(inferior), sp.sympify(superior)) for variable, inferior, superior in dominios]
+    if not _es_aplicable(integrando, dominios):
+        return None
+
+    variables = [variable for variable, _, _ in dominios]
+    polinomio = sp.Poly(integrando, *variables)
+    monomios = len(polinomio.terms())
+    for i, (variable, inferior, superior) in enumerate(dominios):
+        primitiva = polinomio.integrate(variable)
+        restantes = variables[i + 1:]
+        if not restantes:
+            valor = primitiva.as_expr()
+            integral = sp.expand(valor.subs(variable, superior) - valor.subs(variable, inferior))
+            break
+        coeficientes = _por_potencias(primitiva, restantes)
+        polinomio = _evaluar(coeficientes, superior, restantes) - _evaluar(coeficientes, inferior, restantes)
+
+    region = "una caja" if all(not (inf.free_symbols | sup.free_symbols) & set(variables)
+                               for _, inf, sup in dominios) else "una región con límites polinómicos"
+    monomios = "un monomio" if monomios == 1 else f"{monomios} monomios"
+    return integral, (f"Integrando polinómico ({monomios}) sobre {region}: "
+                      f"integración exacta monomio a monomio con sp.Poly.")
@@ -0,0 +1,93 @@
+# separables.py
+
+import sympy as sp
+
+# Términos máximos del integrando expandido (más allá, expandir no compensa)
+MAX_TERMINOS = 200
+
+
+def _limites_constantes(dominios):
+    variables = {variable for variable, _, _ in dominios}
+    return all(not (sp.sympify(limite).free_symbols & variables)
+               for _, inferior, superior in dominios for limite in (inferior, superior))
+
+
+def _separar(expr, variables):
+    """Cada término de `expr` como dict de sp.separatevars, o None si alguno no se separa."""
+    separados = []
+    for termino in sp.Add.make_args(expr):
+        partes = sp.separatevars(termino, symbols=variables, dict=True)
+        if partes is None:
+            return None
+        separados.append(partes)
+    return separados
+
+
+def _formas_equivalentes(integrando):
+    """
+    El integrando tal cual, expandido y, si tiene senos o cosenos, con trigsimp
+    (y expandido de nuevo): tras un cambio a cilíndricas o esféricas,
+    r·exp(-r²cos²θ - r²sin²θ) solo se separa al reducir cos² + sin² = 1. Cada
+    forma se calcula solo si la anterior no se separó.
+    """
+    yield "", integrando
+    expandido = sp.expand(integrando)
+    if len(sp.Add.make_args(expandido)) <= MAX_TERMINOS:
+        yield " (tras expandir)", expandido
+    if integrando.has(sp.sin, sp.cos):
+        simplificado = sp.trigsimp(integrando)
+        yield " (tras simplificar sin² + cos²)", simplificado
+        expandido = sp.expand(simplificado)
+        if len(sp.Add.make_args(expandido)) <= MAX_TERMINOS:
+            yield " (tras simplificar sin² + cos² y expandir)", expandido
+
+
+def _simplificar_factor(factor):
+    """
+    trigsimp de un factor de una sola variable si contiene sumas con senos y
+    cosenos, como (sin²θ + cos²θ)³, que sp.integrate resuelve mucho más
+    despacio que su forma simplificada.
+    """
+    if any(s.is_Add and s.has(sp.sin) and s.has(sp.cos) for s in sp.preorder_traversal(factor)):
+        return sp.trigsimp(factor)
+    return factor
+
+
+def integrar_separable(integrando, dominios):
+    """
+    Integral de `integrando` sobre una caja (todos los límites de `dominios`
+    constantes, en el formato de sp.integrate) cuando cada término del
+    integrando es un producto f(x)·g(y)·h(z): cada término se integra como el
+    producto de tres integrales simples, que se calculan una sola vez aunque se
+    repitan en varios términos.
+
+    Devuelve (integral, nota para el proceso), o None si el dominio no es una
+    caja, algún término no se separa o alguna integral simple no se resuelve.
+    """
+    if not _limites_constantes(dominios):
+        return None
+    variables = [variable for variable, _, _ in dominios]
+    for forma, expr in _formas_equivalentes(sp.sympify(integrando)):
+        separados = _separar(expr, variables)
+        if separados is not None:
+            break
+    else:
+        return None
+
+    simples = {}
+    integral = sp.Integer(0)
+    for partes in separados:
+        producto = partes["coeff"]
+        for variable, inferior, superior in dominios:
+            clave = (partes[variable], variable)
+            if clave not in simples:
+                simples[clave] = sp.integrate(_simplificar_factor(partes[variable]), (variable, inferior, superior))
+            if simples[clave].has(sp.Integral):
+                return None
+            producto *= simples[clave]
+        integral += producto
+
+    nombres = ", ".join(f"d{variable}" for variable in variables)
+    terminos = "un término" if len(separados) == 1 else f"{len(separados)} términos"
+    return integral, (f"Integrando separable sobre una caja{forma}, {terminos}: cada término es un "
+                      f"producto de integrales simples en {nombres} ({len(simples)} distintas).")
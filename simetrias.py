@@ -0,0 +1,173 @@
+# simetrias.py
+
+import sympy as sp
+from sympy.simplify.fu import TR8
+
+# Términos que se citan en el proceso (el resto solo se cuentan)
+MAX_TERMINOS_CITADOS = 3
+
+# Términos máximos al expandir el integrando para buscar partes impares
+MAX_TERMINOS = 200
+
+
+def _iguales(a, b):
+    return a == b or sp.expand(a - b) == 0
+
+
+def _paridad(termino, variable):
+    """"par", "impar" o None según termino(-v) = ±termino(v)."""
+    reflejado = termino.subs(variable, -variable)
+    if _iguales(reflejado, termino):
+        return "par"
+    if _iguales(reflejado, -termino):
+        return "impar"
+    return None
+
+
+def _citar(terminos):
+    citados = ", ".join(str(termino) for termino in terminos[:MAX_TERMINOS_CITADOS])
+    return citados + (", ..." if len(terminos) > MAX_TERMINOS_CITADOS else "")
+
+
+def _limites_internos_pares(dominios, i):
+    """Los límites de las variables más internas que v = dominios[i][0] no cambian con v -> -v."""
+    variable = dominios[i][0]
+    return all(_iguales(limite.subs(variable, -variable), limite)
+               for _, inferior, superior in dominios[:i] for limite in (inferior, superior))
+
+
+def _por_paridad(terminos, dominios, i):
+    """
+    Con límites -a ≤ v ≤ a, los términos impares en v se anulan y, si lo que
+    queda es par, la integral es el doble de la de 0 ≤ v ≤ a. Requiere que los
+    límites internos sean pares en v, para que la integral interna de un
+    término conserve su paridad.
+    """
+    variable, inferior, superior = dominios[i]
+    if not any(termino.has(variable) for termino in terminos) and not any(
+            limite.has(variable) for _, inf, sup in dominios[:i] for limite in (inf, sup)):
+        # El integrando no depende de v: reducir el intervalo no simplifica nada
+        return terminos, dominios, []
+    if not _iguales(inferior, -superior) or not _limites_internos_pares(dominios, i):
+        return terminos, dominios, []
+
+    paridades = [_paridad(termino, variable) for termino in terminos]
+    if None in paridades:
+        # x·(x + y²) no tiene paridad, pero x² + x·y² separa su parte impar
+        expandidos = list(sp.Add.make_args(sp.expand(sp.Add(*terminos))))
+        if len(expandidos) <= MAX_TERMINOS:
+            paridades_expandidos = [_paridad(termino, variable) for termino in expandidos]
+            if "impar" in paridades_expandidos or None not in paridades_expandidos:
+                terminos, paridades = expandidos, paridades_expandidos
+    impares = [termino for termino, paridad in zip(terminos, paridades) if paridad == "impar"]
+    restantes = [termino for termino, paridad in zip(terminos, paridades) if paridad != "impar"]
+    notas = []
+    if impares:
+        notas.append(f"Simetría en {variable}: el intervalo {inferior} ≤ {variable} ≤ {superior} es simétrico y "
+                     f"se anulan los términos impares en {variable} ({_citar(impares)}).")
+    if restantes and all(paridad == "par" for paridad in paridades):
+        terminos = [2 * termino for termino in restantes]
+        dominios = [*dominios[:i], (variable, sp.Integer(0), superior), *dominios[i + 1:]]
+        notas.append(f"Simetría en {variable}: el integrando es par en {variable}, así que "
+                     f"∫({inferior})→({superior}) = 2·∫(0)→({superior}) en d{variable}.")
+        return terminos, dominios, notas
+    return restantes, dominios, notas
+
+
+def _armonico_nulo(factor, variable, longitud):
+    """sin(n·v + c) o cos(n·v + c) integrado sobre un número entero de periodos."""
+    if not isinstance(factor, (sp.sin, sp.cos)):
+        return False
+    argumento = factor.args[0]
+    n = argumento.coeff(variable)
+    if n == 0 or (argumento - n * variable).has(variable):
+        return False
+    periodos = sp.simplify(n * longitud / (2 * sp.pi))
+    return periodos.is_integer is True and periodos != 0
+
+
+def _solo_trigonometrica(expr, variable):
+    """`variable` aparece en `expr` solo dentro de senos y cosenos."""
+    trigonometricas = {f: sp.Dummy() for f in expr.atoms(sp.sin, sp.cos) if f.has(variable)}
+    return bool(trigonometricas) and not expr.xreplace(trigonometricas).has(variable)
+
+
+def _por_periodicidad(terminos, dominios, i):
+    """
+    Sobre un intervalo de longitud múltiplo del periodo, sin(n·v + c) y
+    cos(n·v + c) integran cero. La parte en v de cada término pasa de productos
+    y potencias de senos y cosenos a sumas (TR8) y, si todos sus armónicos se
+    anulan, el término se sustituye por su parte constante en v: cos²θ sobre
+    [0, 2π] queda en 1/2. Si quedaría algún armónico el término no se toca,
+    porque la forma de TR8 es más difícil de integrar que la original.
+    Requiere que los límites internos no dependan de v.
+    """
+    variable, inferior, superior = dominios[i]
+    longitud = superior - inferior
+    if longitud.free_symbols or any(limite.has(variable)
+                                    for _, inf, sup in dominios[:i] for limite in (inf, sup)):
+        return terminos, []
+
+    nuevos, reducidos, armonicos = [], [], set()
+    for termino in terminos:
+        independiente, dependiente = termino.as_independent(variable, as_Add=False)
+        if not _solo_trigonometrica(dependiente, variable):
+            nuevos.append(termino)
+            continue
+        constante, nulos = [], set()
+        for sumando in sp.Add.make_args(sp.expand(TR8(dependiente))):
+            coeficiente, factor = sumando.as_independent(variable, as_Add=False)
+            if factor == 1:
+                constante.append(coeficiente)
+            elif _armonico_nulo(factor, variable, longitud):
+                nulos.add(factor)
+            else:
+                break
+        else:
+            if not nulos:
+                nuevos.append(termino)
+                continue
+            reducidos.append(termino)
+            armonicos |= nulos
+            if constante:
+                nuevos.append(independiente * sp.Add(*constante))
+            continue
+        nuevos.append(termino)
+
+    if not reducidos:
+        return terminos, []
+    verbo = "se reduce" if len(reducidos) == 1 else "se reducen"
+    armonicos = sorted(armonicos, key=sp.default_sort_key)
+    return nuevos, [f"Periodicidad en {variable}: sobre {inferior} ≤ {variable} ≤ {superior} la integral de "
+                    f"{_citar(armonicos)} es cero (periodos completos), así que {_citar(reducidos)} {verbo} "
+                    f"a su parte constante en {variable}."]
+
+
+def simplificar_por_simetria(integrando, dominios, paridad=True, periodicidad=True):
+    """
+    Analiza la paridad del integrando respecto de cada variable con límites
+    simétricos (si `paridad`) y su periodicidad sobre intervalos de periodos
+    completos (si `periodicidad`), antes de integrar: quita los términos cuya
+    integral es cero y, si el integrando es par en una variable, reduce su
+    intervalo a la mitad.
+
+    Devuelve (integrando, dominios, notas para el proceso), con la misma
+    integral que los datos de entrada; sin cambios si no hay simetrías.
+    """
+    integrando = sp.sympify(integrando)
+    dominios = [(variable, sp.sympify(inferior), sp.sympify(superior)) for variable, inferior, superior in dominios]
+    terminos = list(sp.Add.make_args(integrando))
+    notas = []
+    for i in range(len(dominios)):
+        if paridad:
+            terminos, dominios, nuevas = _por_paridad(terminos, dominios, i)
+            notas += nuevas
+        if periodicidad and terminos:
+            terminos, nuevas = _por_periodicidad(terminos, dominios, i)
+            notas += nuevas
+        if not terminos:
+            notas.append("Todos los términos se anulan por simetría: la integral es 0.")
+            break
+    if not notas:
+        return integrando, dominios, []
+    return sp.Add(*terminos), dominios, notas